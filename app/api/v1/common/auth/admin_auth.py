@@ -3,11 +3,11 @@ Admin authentication utilities
 Checks if user has admin role/group in Cognito
 """
 import os
-import requests
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import logging
+from .cognito_auth import get_signing_key
 
 logger = logging.getLogger(__name__)
 
@@ -23,19 +23,6 @@ ADMIN_EMAILS = os.environ.get("ADMIN_EMAILS", "").split(",") if os.environ.get("
 ADMIN_EMAILS = [email.strip() for email in ADMIN_EMAILS if email.strip()]
 
 bearer_scheme = HTTPBearer()
-_jwks = None
-
-def get_jwks():
-    global _jwks
-    if _jwks is None:
-        try:
-            resp = requests.get(COGNITO_JWKS_URL)
-            resp.raise_for_status()
-            _jwks = resp.json()
-        except Exception as e:
-            logger.error(f"Failed to load JWKS: {e}")
-            raise
-    return _jwks
 
 def require_admin_role(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> str:
     """
@@ -50,12 +37,13 @@ def require_admin_role(credentials: HTTPAuthorizationCredentials = Depends(beare
     token = credentials.credentials
     
     try:
-        jwks = get_jwks()
+        # Signing keys are cached and refreshed in cognito_auth
+        key = get_signing_key(token)
         
         # Decode and validate token
         payload = jwt.decode(
             token,
-            jwks,
+            key,
             algorithms=["RS256"],
             audience=COGNITO_APP_CLIENT_ID,
             issuer=COGNITO_ISSUER,
@@ -1,6 +1,11 @@
+import hashlib
 import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
 import requests
-from jose import jwt, JWTError
+from jose import jwk, jwt, JWTError
+from jose.backends.base import Key
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import logging
@@ -13,20 +18,100 @@ COGNITO_APP_CLIENT_ID = os.environ.get("COGNITO_APP_CLIENT_ID", "6kkiqk3qqjnisn9
 COGNITO_ISSUER = f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}"
 COGNITO_JWKS_URL = f"{COGNITO_ISSUER}/.well-known/jwks.json"
 
+# JWKSのキャッシュ期間（秒）。期限切れ後は再取得し、Cognitoの鍵のローテーションに追従する
+JWKS_TTL_SECONDS = int(os.environ.get("JWKS_TTL_SECONDS", "43200"))
+# 未知のkidによる再取得の最短間隔（秒）。不正なトークンで毎回取得しに行かないようにする
+JWKS_MIN_REFRESH_SECONDS = 60
+JWKS_REQUEST_TIMEOUT_SECONDS = 5
+
 bearer_scheme = HTTPBearer()
-_jwks = None
+# コネクションを使い回すため、セッションはプロセス内で1つだけ生成する
+_http = requests.Session()
+# 同時に届いたリクエストがそれぞれJWKSを取得しに行かないようにする（依存関数はスレッドプールで実行される）
+_jwks_lock = threading.Lock()
+_jwks_by_kid: Optional[Dict[str, Key]] = None
+_jwks_fetched_at = 0.0
+
+def _jwks_needs_refresh(force_refresh: bool) -> bool:
+    if _jwks_by_kid is None:
+        return True
+    age = time.monotonic() - _jwks_fetched_at
+    return age >= (JWKS_MIN_REFRESH_SECONDS if force_refresh else JWKS_TTL_SECONDS)
+
+def get_jwks(force_refresh: bool = False) -> Dict[str, Key]:
+    """
+    kidごとの公開鍵を返す（JWKから鍵オブジェクトへの変換は取得時に1回だけ行い、リクエスト毎には行わない）
+    JWKS_TTL_SECONDSの間はキャッシュを返し、force_refresh=Trueの場合は前回の取得から
+    JWKS_MIN_REFRESH_SECONDS以上経っていれば再取得する
+    """
+    global _jwks_by_kid, _jwks_fetched_at
+    if not _jwks_needs_refresh(force_refresh):
+        return _jwks_by_kid
+
+    with _jwks_lock:
+        # ロック待ちの間に他のスレッドが取得済みの場合はそれを使う
+        if _jwks_needs_refresh(force_refresh):
+            try:
+                resp = _http.get(COGNITO_JWKS_URL, timeout=JWKS_REQUEST_TIMEOUT_SECONDS)
+                resp.raise_for_status()
+                _jwks_by_kid = {
+                    key["kid"]: jwk.construct(key, key.get("alg", "RS256"))
+                    for key in resp.json().get("keys", [])
+                }
+                _jwks_fetched_at = time.monotonic()
+            except Exception as e:
+                logger.error(f"Failed to load JWKS: {e}")
+                if _jwks_by_kid is None:
+                    raise
+                # 取得済みの鍵で検証を続け、再取得はJWKS_MIN_REFRESH_SECONDS後に行う
+                _jwks_fetched_at = time.monotonic() - JWKS_TTL_SECONDS + JWKS_MIN_REFRESH_SECONDS
+    return _jwks_by_kid
+
+# 検証済みトークンのキャッシュ。同じアクセストークンで続けて呼ばれるため、署名の検証を省く
+# （Cognito側で失効させたトークンも、最大VERIFIED_TOKEN_TTL_SECONDSの間は受け付ける）
+VERIFIED_TOKEN_TTL_SECONDS = 300
+VERIFIED_TOKEN_CACHE_SIZE = 1024
+_verified_tokens: Dict[bytes, Tuple[str, float]] = {}
+_verified_tokens_lock = threading.Lock()
 
-def get_jwks():
-    global _jwks
-    if _jwks is None:
-        try:
-            resp = requests.get(COGNITO_JWKS_URL)
-            resp.raise_for_status()
-            _jwks = resp.json()
-        except Exception as e:
-            logger.error(f"Failed to load JWKS: {e}")
-            raise
-    return _jwks
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def _get_cached_user_id(cache_key: bytes) -> Optional[str]:
+    """検証済みトークンのユーザーIDを返す（キャッシュにない場合・期限切れの場合はNone）"""
+    with _verified_tokens_lock:
+        entry = _verified_tokens.get(cache_key)
+        if entry is None:
+            return None
+        user_id, expires_at = entry
+        if time.time() >= expires_at:
+            del _verified_tokens[cache_key]
+            return None
+        return user_id
+
+def _cache_user_id(cache_key: bytes, user_id: str, exp: Optional[int]) -> None:
+    """検証済みトークンのユーザーIDを、トークンの有効期限を超えない範囲でキャッシュする"""
+    expires_at = time.time() + VERIFIED_TOKEN_TTL_SECONDS
+    if exp is not None:
+        expires_at = min(expires_at, float(exp))
+    with _verified_tokens_lock:
+        _verified_tokens[cache_key] = (user_id, expires_at)
+        # 上限を超えた場合は最も古いものから削除（FIFO）
+        if len(_verified_tokens) > VERIFIED_TOKEN_CACHE_SIZE:
+            del _verified_tokens[next(iter(_verified_tokens))]
+
+def get_signing_key(token: str) -> Key:
+    """
+    トークンのヘッダーのkidに対応する公開鍵を返す
+    キャッシュにないkidの場合は、鍵がローテーションされた可能性があるためJWKSを再取得する
+    """
+    kid = jwt.get_unverified_header(token).get("kid")
+    key = get_jwks().get(kid)
+    if key is None:
+        key = get_jwks(force_refresh=True).get(kid)
+    if key is None:
+        raise JWTError(f"Unknown key id: {kid}")
+    return key
 
 def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> str:
     """
@@ -34,14 +119,18 @@ def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(bear
     認証失敗時は401エラーを返す
     """
     token = credentials.credentials
+    cache_key = _token_cache_key(token)
+    cached_user_id = _get_cached_user_id(cache_key)
+    if cached_user_id:
+        return cached_user_id
     
     try:
-        jwks = get_jwks()
+        key = get_signing_key(token)
         
         # at_hashクレームの検証を無効にする
         payload = jwt.decode(
             token,
-            jwks,
+            key,
             algorithms=["RS256"],
             audience=COGNITO_APP_CLIENT_ID,
             issuer=COGNITO_ISSUER,
@@ -56,6 +145,7 @@ def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(bear
                 detail="Invalid token: missing user ID"
             )
         
+        _cache_user_id(cache_key, user_id, payload.get("exp"))
         return user_id
         
     except JWTError as e:
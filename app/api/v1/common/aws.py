@@ -0,0 +1,13 @@
+from botocore.config import Config
+
+# 全LambdaのDynamoDBクライアント・リソースで共通の設定
+# asyncio.gatherやスレッドプールで並列にリクエストしてもHTTPコネクションの空き待ちにならないようにプールを広げる
+# スロットリング時はadaptiveモードでクライアント側の送信レートを調整し、再試行は3回までにする
+# 接続・応答が止まった場合は既定の60秒を待たずに打ち切って再試行する（API Gatewayのタイムアウトは29秒）
+DYNAMODB_CONFIG = Config(
+    max_pool_connections=50,
+    retries={'mode': 'adaptive', 'max_attempts': 3},
+    connect_timeout=5,
+    read_timeout=10,
+    tcp_keepalive=True
+)
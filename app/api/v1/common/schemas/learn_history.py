@@ -1,8 +1,9 @@
 from pydantic import BaseModel, Field
-from typing import Literal, Optional, Union
+from typing import List, Literal, Optional, Union
 from datetime import datetime
 from decimal import Decimal
 from common.config import MIN_LEVEL, MAX_LEVEL
+from common.schemas.word import Word
 
 LearningMode = Literal["MJ", "JM"]
 
@@ -28,6 +29,11 @@ class NextWordResponse(BaseModel):
     answer_word_id: int
     mode: LearningMode
 
+class NextWordSuccessResponse(BaseModel):
+    mode: LearningMode
+    answer_word: Word
+    other_words: List[Word]
+
 class NoWordAvailableResponse(BaseModel):
     message: str = "現在学習可能な単語がありません"
     next_available_datetime: Optional[datetime] = None 
\ No newline at end of file
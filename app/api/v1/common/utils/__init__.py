@@ -1,4 +1,5 @@
 """
 Common utilities package for Japanese Learn API
 """
-from .utils import convert_hiragana_to_romaji 
\ No newline at end of file
+from .utils import convert_hiragana_to_romaji
+from .datetime_utils import parse_iso_datetime
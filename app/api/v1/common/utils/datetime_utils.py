@@ -0,0 +1,30 @@
+import logging
+from functools import lru_cache
+from datetime import datetime, timezone
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 同じnext_datetimeの文字列はリクエストをまたいで繰り返し解析されるため、解析結果をプロセス内でキャッシュする
+# （datetimeは不変のため共有できる）
+@lru_cache(maxsize=4096)
+def _parse_iso_datetime(dt_str: str) -> Optional[datetime]:
+    try:
+        dt = datetime.fromisoformat(dt_str)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt
+    except ValueError as e:
+        logger.warning(f"Invalid datetime format: {dt_str}, error: {e}")
+        return None
+
+def parse_iso_datetime(dt_str: Optional[str]) -> Optional[datetime]:
+    """ISO形式の文字列をタイムゾーン付きのdatetimeに変換します（タイムゾーンがない場合はUTC）
+    空・不正な値の場合はNoneを返します
+    """
+    if not dt_str:
+        return None
+    if not isinstance(dt_str, str):
+        logger.warning(f"Invalid datetime type: {type(dt_str).__name__}, value: {dt_str}")
+        return None
+    return _parse_iso_datetime(dt_str)
@@ -7,14 +7,25 @@ from typing import Dict, List, Optional
 import boto3
 from botocore.exceptions import ClientError
 
+from common.aws import DYNAMODB_CONFIG
+
 logger = logging.getLogger(__name__)
 
+TABLE_NAME = os.getenv("DYNAMODB_TABLE_NAME", "japanese-learn-table")
+
+# 学習記録用・出題用のサービスがそれぞれクライアントを持つため、リソースとTableはプロセス内で共有する
+_dynamodb = boto3.resource("dynamodb", config=DYNAMODB_CONFIG)
+_table = _dynamodb.Table(TABLE_NAME)
+
+# char, character, levelは予約語のため、ProjectionExpressionでは別名で指定する
+KANA_ATTRIBUTE_NAMES = {"#char": "char", "#character": "character", "#level": "level"}
+
 
 class DynamoDBKanaLessonClient:
     def __init__(self) -> None:
-        self.table_name = os.getenv("DYNAMODB_TABLE_NAME", "japanese-learn-table")
-        self.dynamodb = boto3.resource("dynamodb")
-        self.table = self.dynamodb.Table(self.table_name)
+        self.table_name = TABLE_NAME
+        self.dynamodb = _dynamodb
+        self.table = _table
 
     def get_current_learning_data(self, user_id: str, char: str) -> Optional[Dict]:
         try:
@@ -79,10 +90,12 @@ class DynamoDBKanaLessonClient:
         try:
             response = self.table.query(
                 KeyConditionExpression="PK = :pk AND begins_with(SK, :sk_prefix)",
+                ExpressionAttributeNames=KANA_ATTRIBUTE_NAMES,
                 ExpressionAttributeValues={
                     ":pk": f"USER#{user_id}",
                     ":sk_prefix": "KANA#",
                 },
+                ProjectionExpression="SK, #char, #character, #level, proficiency, next_datetime, updated_at",
             )
             items = response.get("Items", [])
             return [self._convert_kana_item(item) for item in items]
@@ -93,21 +106,30 @@ class DynamoDBKanaLessonClient:
             return []
 
     async def get_level_chars(self, level: int) -> List[Dict]:
-        """指定されたレベルのかな一覧を取得します"""
+        """指定されたレベルのかな一覧を取得します
+        KANAパーティション全体を読んでからレベルで絞り込まず、word-level-index GSIでレベルを指定して取得します
+        """
         try:
-            response = self.table.query(
-                KeyConditionExpression="PK = :pk",
-                ExpressionAttributeValues={
+            items: List[Dict] = []
+            query_params = {
+                "IndexName": "word-level-index",
+                "KeyConditionExpression": "PK = :pk AND #level = :level",
+                "ExpressionAttributeNames": KANA_ATTRIBUTE_NAMES,
+                "ExpressionAttributeValues": {
                     ":pk": "KANA",
+                    ":level": int(level),
                 },
-            )
-            items = response.get("Items", [])
-            results: List[Dict] = []
-            for item in items:
-                converted = self._convert_kana_item(item)
-                if converted.get("level") == level:
-                    results.append(converted)
-            return results
+                "ProjectionExpression": "SK, #char, #character, #level",
+            }
+            while True:
+                response = self.table.query(**query_params)
+                items.extend(response.get("Items", []))
+
+                last_evaluated_key = response.get("LastEvaluatedKey")
+                if not last_evaluated_key:
+                    break
+                query_params["ExclusiveStartKey"] = last_evaluated_key
+            return [self._convert_kana_item(item) for item in items]
         except ClientError as exc:
             logger.error(
                 "Error getting kana list for level %s from DynamoDB: %s", level, exc
@@ -1,34 +1,26 @@
 import logging
 from datetime import datetime, timezone
 from typing import Optional, Sequence, Mapping, Any
+from common.utils.datetime_utils import parse_iso_datetime
 
 logger = logging.getLogger(__name__)
 
-
 class DateTimeUtils:
     @staticmethod
     def parse_datetime_safe(dt_str: str) -> Optional[datetime]:
         """ISO形式の文字列をdatetimeに変換します。"""
-        if not dt_str:
-            return None
-        try:
-            dt = datetime.fromisoformat(dt_str)
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone.utc)
-            return dt
-        except (TypeError, ValueError) as exc:
-            logger.warning("Invalid datetime format detected: %s error=%s", dt_str, exc)
-            return None
+        return parse_iso_datetime(dt_str)
 
     @staticmethod
-    def is_reviewable(item: Mapping[str, Any]) -> bool:
-        """復習可能かどうかを判定します。"""
+    def is_reviewable(item: Mapping[str, Any], now: Optional[datetime] = None) -> bool:
+        """復習可能かどうかを判定します（nowを省略した場合は現在時刻）。
+        多数のかなを判定する場合は、nowを一度だけ取得して渡してください。
+        """
         next_dt_raw = item.get("next_datetime")
         next_dt = DateTimeUtils.parse_datetime_safe(next_dt_raw)
         if next_dt is None:
             return False
-        now = datetime.now(timezone.utc)
-        return next_dt <= now
+        return next_dt <= (now or datetime.now(timezone.utc))
 
     @staticmethod
     def get_next_available_time(items: Sequence[Mapping[str, Any]]) -> Optional[datetime]:
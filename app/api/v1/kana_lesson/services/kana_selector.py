@@ -17,28 +17,34 @@ class KanaSelector:
     def select_new_char(level_chars: List[Dict], user_chars: List[Dict]) -> Optional[Dict]:
         """未学習のかなを選択します。"""
         learned = {KanaSelector._extract_char(item) for item in user_chars}
-        candidates = [
-            char for char in level_chars if KanaSelector._extract_char(char) not in learned
-        ]
-        if not candidates:
+        # 候補リストを作らずに1回の走査で選ぶ（リザーバサンプリング：k番目の候補を確率1/kで採用）
+        selected = None
+        candidate_count = 0
+        for char in level_chars:
+            if KanaSelector._extract_char(char) in learned:
+                continue
+            candidate_count += 1
+            if random.randrange(candidate_count) == 0:
+                selected = char
+        if selected is None:
             return None
-        selected = random.choice(candidates)
         logger.debug("Selected new kana: %s", selected)
         return {"answer_char": KanaSelector._summarize_char(selected)}
 
     @staticmethod
     def select_review_char(user_level_chars: List[Dict]) -> Optional[Dict]:
         """復習対象のかなを選択します。"""
-        reviewable = [
-            char for char in user_level_chars if DateTimeUtils.is_reviewable(char)
-        ]
-        if not reviewable:
-            return None
+        # 復習可能なかなのうち、next_datetimeが最も古いものを1回の走査で選択（中間リストを作らない）
+        # 現在時刻は1回だけ取得して全てのかなの判定に使う
+        now = datetime.now(timezone.utc)
         answer = min(
-            reviewable,
+            (char for char in user_level_chars if DateTimeUtils.is_reviewable(char, now)),
             key=lambda item: DateTimeUtils.parse_datetime_safe(item.get("next_datetime"))
             or datetime.min.replace(tzinfo=timezone.utc),
+            default=None,
         )
+        if answer is None:
+            return None
         logger.debug("Selected review kana: %s", answer)
         return {"answer_char": KanaSelector._summarize_char(answer)}
 
@@ -1,25 +1,47 @@
+import asyncio
 import json
 import logging
 import os
+from contextlib import asynccontextmanager
 from mangum import Mangum
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional
-import boto3
-from botocore.exceptions import ClientError
 
 # ロギングの設定
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
 
 # 環境変数からroot_pathを取得（ローカル開発時は空文字）
 ROOT_PATH = os.getenv('ROOT_PATH', '')
 
+from integrations.dynamodb.base import open_dynamodb, close_dynamodb
+from services.learning_service import LearningService
+from services.next_service import NextService
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """DynamoDBリソース（コネクションプール）とサービスを起動時に生成し、終了時にクローズします
+    全レベルの単語IDプールもここで先読みし、以降は定期的に取得し直します
+    Lambda（Mangum, lifespan="off"）では実行されず、初回アクセス時に遅延生成・バックグラウンドで先読みされます
+    """
+    app.state.ddb = await open_dynamodb()
+    app.state.next_service = NextService()
+    app.state.learning_service = LearningService()
+    await app.state.next_service.prefetch_level_pools()
+    refresh_task = asyncio.create_task(app.state.next_service.refresh_level_pools_periodically())
+    yield
+    refresh_task.cancel()
+    await close_dynamodb()
+
 # FastAPIアプリケーションの初期化
 app = FastAPI(
     title="Japanese Learn API - Learning History",
     description="API for managing learning history",
     version="1.0.0",
-    root_path=ROOT_PATH
+    root_path=ROOT_PATH,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # エンドポイントのインポート
@@ -51,14 +73,19 @@ def get_allowed_origin(event):
 
 def lambda_handler(event, context):
     try:
-        # リクエスト情報をログに記録
-        logger.info(f"Received event: {json.dumps(event)}")
+        # リクエスト情報をログに記録（INFOが無効な場合はイベント全体のシリアライズを行わない）
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Received event: %s", json.dumps(event))
         
         # OPTIONSリクエスト（プリフライトリクエスト）の処理
         http_method = event.get('httpMethod') or event.get('requestContext', {}).get('httpMethod', '')
         if http_method == 'OPTIONS':
             allowed_origin = get_allowed_origin(event)
-            logger.info(f"OPTIONS request received. Origin: {event.get('headers', {}).get('origin') or event.get('headers', {}).get('Origin')}, Allowed: {allowed_origin}")
+            logger.info(
+                "OPTIONS request received. Origin: %s, Allowed: %s",
+                event.get('headers', {}).get('origin') or event.get('headers', {}).get('Origin'),
+                allowed_origin
+            )
             
             if allowed_origin:
                 # 許可されたOriginの場合のみCORSヘッダーを返す
@@ -70,7 +97,7 @@ def lambda_handler(event, context):
                     'Access-Control-Allow-Credentials': 'true',
                     'Access-Control-Max-Age': '86400'
                 }
-                logger.info(f"Returning CORS headers with allowed origin: {allowed_origin}")
+                logger.info("Returning CORS headers with allowed origin: %s", allowed_origin)
                 return {
                     'statusCode': 200,
                     'headers': cors_headers,
@@ -78,7 +105,7 @@ def lambda_handler(event, context):
                 }
             else:
                 # 許可されていないOriginの場合は、CORSヘッダーを一切返さない
-                logger.warning(f"Origin not allowed. No CORS headers will be returned.")
+                logger.warning("Origin not allowed. No CORS headers will be returned.")
                 return {
                     'statusCode': 200,
                     'headers': {
@@ -107,8 +134,9 @@ def lambda_handler(event, context):
             })
         # 許可されていないオリジンの場合はCORSヘッダーを返さない（ブラウザがブロックする）
         
-        # レスポンス情報をログに記録
-        logger.info(f"Response: {json.dumps(response)}")
+        # レスポンス情報をログに記録（INFOが無効な場合はレスポンス全体のシリアライズを行わない）
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Response: %s", json.dumps(response))
         
         return response
     except Exception as e:
@@ -1,19 +1,51 @@
-from fastapi import APIRouter, HTTPException, Depends
-from common.schemas.learn_history import LearnHistoryRequest, LearnHistoryResponse, NextWordRequest, NextWordResponse, NoWordAvailableResponse
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse
+from common.schemas.learn_history import LearnHistoryRequest, LearnHistoryResponse, NextWordRequest, NextWordSuccessResponse, NoWordAvailableResponse
 from services.learning_service import LearningService
 from services.next_service import NextService
+import asyncio
 import logging
+import os
 from pydantic import BaseModel, Field
 from typing import List, Union
 from datetime import datetime, timezone
 from common.auth import get_current_user_id
+from common.auth.admin_auth import require_admin_role
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
-# サービスのインスタンスを作成
-learning_service = LearningService()
-next_service = NextService()
+# 同時に処理するリクエスト数の上限（超えた場合は503を返し、バースト時にDynamoDBへ負荷が集中するのを防ぐ）
+MAX_IN_FLIGHT_REQUESTS = int(os.getenv('MAX_IN_FLIGHT_REQUESTS', '50'))
+RETRY_AFTER_SECONDS = os.getenv('RETRY_AFTER_SECONDS', '1')
+_request_semaphore = asyncio.Semaphore(MAX_IN_FLIGHT_REQUESTS)
+
+async def limit_concurrency():
+    """同時処理数が上限に達している場合は待たずに503を返します"""
+    if _request_semaphore.locked():
+        logger.warning(f"Too many in-flight requests (limit: {MAX_IN_FLIGHT_REQUESTS})")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy. Please retry later.",
+            headers={"Retry-After": RETRY_AFTER_SECONDS}
+        )
+    async with _request_semaphore:
+        yield
+
+def get_learning_service(request: Request) -> LearningService:
+    """共有のLearningServiceを取得します（lifespan未実行の場合は初回に生成します）"""
+    service = getattr(request.app.state, 'learning_service', None)
+    if service is None:
+        service = request.app.state.learning_service = LearningService()
+    return service
+
+async def get_next_service(request: Request) -> NextService:
+    """共有のNextServiceを取得します（lifespan未実行の場合は初回に生成し、単語IDプールの先読みを開始します）"""
+    service = getattr(request.app.state, 'next_service', None)
+    if service is None:
+        service = request.app.state.next_service = NextService()
+        service.prefetch_level_pools_in_background()
+    return service
 
 def parse_datetime_with_tz(dt_str):
     dt = datetime.fromisoformat(dt_str)
@@ -22,8 +54,12 @@ def parse_datetime_with_tz(dt_str):
         dt = dt.replace(tzinfo=timezone.utc)
     return dt
 
-@router.post("/", response_model=LearnHistoryResponse)
-async def record_learning(request: LearnHistoryRequest, current_user_id: str = Depends(get_current_user_id)):
+@router.post("/", response_model=LearnHistoryResponse, dependencies=[Depends(limit_concurrency)])
+async def record_learning(
+    request: LearnHistoryRequest,
+    current_user_id: str = Depends(get_current_user_id),
+    learning_service: LearningService = Depends(get_learning_service)
+):
     """
     学習履歴を記録し、次の学習情報を返します。
     認証：必須（Bearerトークン）
@@ -38,15 +74,25 @@ async def record_learning(request: LearnHistoryRequest, current_user_id: str = D
             time=request.time
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error in record_learning endpoint: {str(e)}")
+        logger.exception("Error in record_learning endpoint")
         raise HTTPException(
             status_code=500,
             detail=str(e)
         )
 
-@router.post("/next", response_model=Union[dict, NoWordAvailableResponse])
-async def get_next_word(request: NextWordRequest, current_user_id: str = Depends(get_current_user_id)):
+@router.post(
+    "/next",
+    response_model=Union[NextWordSuccessResponse, NoWordAvailableResponse],
+    dependencies=[Depends(limit_concurrency)]
+)
+async def get_next_word(
+    request: NextWordRequest,
+    current_user_id: str = Depends(get_current_user_id),
+    next_service: NextService = Depends(get_next_service)
+):
     """
     次に学習すべき単語を取得します。
     認証：必須（Bearerトークン）
@@ -57,75 +103,15 @@ async def get_next_word(request: NextWordRequest, current_user_id: str = Depends
     - "REVIEW_ALL"：全レベルから復習可能な単語（next_datetimeが最も古いもの）を取得
     """
     try:
-        # 1. 出題単語IDとモード取得
-        next_result = await next_service.get_next_word(
-            user_id=current_user_id,
-            level=request.level
-        )
-        if not next_result:
-            raise HTTPException(status_code=404, detail="No words found for the specified level")
-        
+        quiz = await next_service.build_quiz(user_id=current_user_id, level=request.level)
+
         # 単語がない場合のレスポンスをチェック
-        if next_result.get('no_word_available'):
+        if quiz.get('no_word_available'):
             return NoWordAvailableResponse(
-                next_available_datetime=next_result.get('next_available_datetime')
+                next_available_datetime=quiz.get('next_available_datetime')
             )
-        
-        answer_word_id = int(next_result['answer_word_id'])
-        mode = next_result['mode']
-
-        # 2. 他の単語ID取得
-        other_word_ids = await next_service.get_other_words(request.level, answer_word_id)
-        if not other_word_ids or len(other_word_ids) < 3:
-            raise HTTPException(status_code=404, detail="Not enough words found for the specified level")
-
-        # 3. 単語詳細をまとめて取得（batch_get_itemを使用）
-        word_ids = [answer_word_id] + other_word_ids
-        words_detail_dict = await next_service.batch_get_word_details(word_ids)
-        
-        # 辞書からリストに変換（元の順序を保持）し、存在しない単語をフィルタリング
-        valid_words = []
-        missing_word_ids = []
-        for word_id in word_ids:
-            result = words_detail_dict.get(word_id)
-            if result is None:
-                logger.warning(f"Word {word_id} not found in DynamoDB, skipping")
-                missing_word_ids.append(word_id)
-            else:
-                valid_words.append(result)
-        
-        # 正解の単語が存在しない場合、エラーを返す
-        if not valid_words or valid_words[0] is None:
-            logger.error(f"Answer word {answer_word_id} not found in DynamoDB")
-            raise HTTPException(status_code=404, detail=f"Answer word {answer_word_id} not found")
-        
-        answer_word = valid_words[0]
-        
-        # 他の単語が3つ未満の場合、追加で取得
-        other_words = valid_words[1:]
-        if len(other_words) < 3 and missing_word_ids:
-            logger.info(f"Only {len(other_words)} valid words found, fetching additional words excluding {missing_word_ids}")
-            additional_exclude_ids = [answer_word_id] + [w['id'] for w in other_words] + missing_word_ids
-            additional_word_ids = await next_service.get_other_words(request.level, answer_word_id, additional_exclude_ids)
-            
-            if additional_word_ids:
-                additional_details_dict = await next_service.batch_get_word_details(additional_word_ids)
-                for word_id in additional_word_ids:
-                    result = additional_details_dict.get(word_id)
-                    if result is not None:
-                        other_words.append(result)
-                        if len(other_words) >= 3:
-                            break
-        
-        # 他の単語が3つ未満の場合、エラーを返す
-        if len(other_words) < 3:
-            raise HTTPException(status_code=404, detail=f"Not enough valid words found. Only {len(other_words)} valid words available.")
-
-        return {
-            "mode": mode,
-            "answer_word": answer_word,
-            "other_words": other_words[:3]  # 最大3つまで
-        }
+        # 単語詳細はDAOで正規化済みのため、response_modelによる再検証を行わずにそのまま返す
+        return ORJSONResponse(content=quiz)
     except HTTPException:
         # HTTPExceptionはそのまま再発生
         raise
@@ -133,7 +119,7 @@ async def get_next_word(request: NextWordRequest, current_user_id: str = Depends
         error_detail = str(e) if str(e) else repr(e)
         if hasattr(e, 'detail'):
             error_detail = e.detail
-        logger.error(f"Error in get_next_word endpoint: {error_detail}", exc_info=True)
+        logger.exception("Error in get_next_word endpoint")
         raise HTTPException(status_code=500, detail=error_detail if error_detail else "Internal server error")
 
 class OtherWordsRequest(BaseModel):
@@ -141,7 +127,10 @@ class OtherWordsRequest(BaseModel):
     answer_word_id: int = Field(..., description="正解の単語ID（このIDは選択肢から除外されます）")
 
 @router.post("/other_words", response_model=List[int])
-async def get_other_words(request: OtherWordsRequest) -> List[int]:
+async def get_other_words(
+    request: OtherWordsRequest,
+    next_service: NextService = Depends(get_next_service)
+) -> List[int]:
     """指定されたレベルで、正解の単語ID以外の単語を3つ取得します。
     
     このエンドポイントは、クイズの選択肢として使用する単語を取得します。
@@ -163,81 +152,30 @@ async def get_other_words(request: OtherWordsRequest) -> List[int]:
         word_ids = await next_service.get_other_words(request.level, request.answer_word_id)
         if not word_ids:
             raise HTTPException(status_code=404, detail="Not enough words found for the specified level")
-        return word_ids
+        # 単語IDはキャッシュ済みのプールから取り出したintのため、response_modelによる再検証を行わずにそのまま返す
+        return ORJSONResponse(content=word_ids)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error getting other words: {str(e)}")
+        logger.exception("Error getting other words")
         raise HTTPException(status_code=500, detail=str(e))
 
 class RandomWordRequest(BaseModel):
     level: int = Field(..., description="取得する単語のレベル")
 
-@router.post("/next/random")
-async def get_random_word(request: RandomWordRequest):
+@router.post("/next/random", response_model=NextWordSuccessResponse, dependencies=[Depends(limit_concurrency)])
+async def get_random_word(
+    request: RandomWordRequest,
+    next_service: NextService = Depends(get_next_service)
+):
     """
     指定されたレベルからランダムに単語を1つ取得します。
     認証は不要です。
     """
     try:
-        # 1. ランダムに単語IDとモードを取得
-        next_result = await next_service.get_random_word(level=request.level)
-        if not next_result:
-            raise HTTPException(status_code=404, detail="No words found for the specified level")
-        
-        answer_word_id = int(next_result['answer_word_id'])
-        mode = next_result['mode']
-
-        # 2. 他の単語IDを取得
-        other_word_ids = await next_service.get_other_words(request.level, answer_word_id)
-        if not other_word_ids or len(other_word_ids) < 3:
-            raise HTTPException(status_code=404, detail="Not enough words found for the specified level")
-
-        # 3. 単語詳細をまとめて取得（batch_get_itemを使用）
-        word_ids = [answer_word_id] + other_word_ids
-        words_detail_dict = await next_service.batch_get_word_details(word_ids)
-        
-        # 辞書からリストに変換（元の順序を保持）し、存在しない単語をフィルタリング
-        valid_words = []
-        missing_word_ids = []
-        for word_id in word_ids:
-            result = words_detail_dict.get(word_id)
-            if result is None:
-                logger.warning(f"Word {word_id} not found in DynamoDB, skipping")
-                missing_word_ids.append(word_id)
-            else:
-                valid_words.append(result)
-        
-        # 正解の単語が存在しない場合、エラーを返す
-        if not valid_words or valid_words[0] is None:
-            logger.error(f"Answer word {answer_word_id} not found in DynamoDB")
-            raise HTTPException(status_code=404, detail=f"Answer word {answer_word_id} not found")
-        
-        answer_word = valid_words[0]
-        
-        # 他の単語が3つ未満の場合、追加で取得
-        other_words = valid_words[1:]
-        if len(other_words) < 3 and missing_word_ids:
-            logger.info(f"Only {len(other_words)} valid words found, fetching additional words excluding {missing_word_ids}")
-            additional_exclude_ids = [answer_word_id] + [w['id'] for w in other_words] + missing_word_ids
-            additional_word_ids = await next_service.get_other_words(request.level, answer_word_id, additional_exclude_ids)
-            
-            if additional_word_ids:
-                additional_details_dict = await next_service.batch_get_word_details(additional_word_ids)
-                for word_id in additional_word_ids:
-                    result = additional_details_dict.get(word_id)
-                    if result is not None:
-                        other_words.append(result)
-                        if len(other_words) >= 3:
-                            break
-        
-        # 他の単語が3つ未満の場合、エラーを返す
-        if len(other_words) < 3:
-            raise HTTPException(status_code=404, detail=f"Not enough valid words found. Only {len(other_words)} valid words available.")
-
-        return {
-            "mode": mode,
-            "answer_word": answer_word,
-            "other_words": other_words[:3]  # 最大3つまで
-        }
+        quiz = await next_service.build_quiz(user_id=None, level=request.level, random_word=True)
+        # 単語詳細はDAOで正規化済みのため、response_modelによる再検証を行わずにそのまま返す
+        return ORJSONResponse(content=quiz)
     except HTTPException:
         # HTTPExceptionはそのまま再発生
         raise
@@ -245,5 +183,23 @@ async def get_random_word(request: RandomWordRequest):
         error_detail = str(e) if str(e) else repr(e)
         if hasattr(e, 'detail'):
             error_detail = e.detail
-        logger.error(f"Error in get_random_word endpoint: {error_detail}", exc_info=True)
-        raise HTTPException(status_code=500, detail=error_detail if error_detail else "Internal server error")
\ No newline at end of file
+        logger.exception("Error in get_random_word endpoint")
+        raise HTTPException(status_code=500, detail=error_detail if error_detail else "Internal server error")
+
+@router.delete("/cache/levels/{level}")
+async def invalidate_level_words_cache(
+    level: int,
+    admin_user: str = Depends(require_admin_role),
+    next_service: NextService = Depends(get_next_service)
+):
+    """
+    レベル別単語リストのキャッシュを削除します（単語の追加・削除後に使用）。
+    認証：必須（管理者のみ）
+    プロセス内キャッシュは、このリクエストを処理したインスタンスのもののみ削除されます。
+    """
+    try:
+        await next_service.invalidate_level_words(level)
+        return {"message": "Level words cache invalidated", "level": level}
+    except Exception as e:
+        logger.exception("Error in invalidate_level_words_cache endpoint")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,20 +1,125 @@
-import boto3
+import asyncio
 import os
 import logging
+from contextlib import AsyncExitStack
+from functools import lru_cache
+from typing import Dict, List, Optional
+import aioboto3
 from botocore.exceptions import ClientError
+from common.aws import DYNAMODB_CONFIG
 
 logger = logging.getLogger(__name__)
 
+TABLE_NAME = os.getenv('DYNAMODB_TABLE_NAME', 'japanese-learn-table')
+
+# aioboto3のリソースはコネクションプールを持つため、プロセス内で1つだけ生成して使い回す
+# Lambda（Mangum, lifespan="off"）では初回アクセス時に遅延生成し、
+# ローカル（uvicorn）ではFastAPIのlifespanで生成・クローズする
+_session = aioboto3.Session()
+_exit_stack: Optional[AsyncExitStack] = None
+_resource = None
+_client = None
+_table = None
+_init_lock = asyncio.Lock()
+
+
+@lru_cache(maxsize=1024)
+def user_pk(user_id: str) -> str:
+    """ユーザーのパーティションキー（USER#{user_id}）を返します
+    同じワーカーには同じユーザーのリクエストが続くため、生成した文字列をリクエスト間で使い回す
+    """
+    return f"USER#{user_id}"
+
+
+async def open_dynamodb():
+    """DynamoDBリソースとクライアントを生成します（生成済みの場合はそれを返します）"""
+    global _exit_stack, _resource, _client, _table
+    if _resource is not None:
+        return _resource
+
+    async with _init_lock:
+        if _resource is None:
+            exit_stack = AsyncExitStack()
+            resource = await exit_stack.enter_async_context(_session.resource('dynamodb', config=DYNAMODB_CONFIG))
+            # resource.meta.clientは型変換が自動で行われるため、低レベルAPI用に別途clientを生成する
+            _client = await exit_stack.enter_async_context(_session.client('dynamodb', config=DYNAMODB_CONFIG))
+            _table = await resource.Table(TABLE_NAME)
+            _exit_stack, _resource = exit_stack, resource
+    return _resource
+
+
+async def close_dynamodb() -> None:
+    """DynamoDBリソースをクローズします"""
+    global _exit_stack, _resource, _client, _table
+    if _exit_stack is None:
+        return
+
+    exit_stack = _exit_stack
+    _exit_stack, _resource, _client, _table = None, None, None, None
+    await exit_stack.aclose()
+
+
 class DynamoDBBase:
     def __init__(self):
-        self.table_name = os.getenv('DYNAMODB_TABLE_NAME', 'japanese-learn-table')
-        self.dynamodb = boto3.resource('dynamodb')
-        self.table = self.dynamodb.Table(self.table_name)
+        self.table_name = TABLE_NAME
+
+    async def get_table(self):
+        """共有のTableリソースを取得します"""
+        await open_dynamodb()
+        return _table
+
+    async def get_client(self):
+        """共有の低レベルクライアントを取得します（batch_get_item用）"""
+        await open_dynamodb()
+        return _client
+
+    async def query_all_items(self, **query_params) -> List[Dict]:
+        """queryの結果を全ページ分取得します（1回のqueryは最大1MBまでのため、LastEvaluatedKeyがなくなるまで続ける）"""
+        table = await self.get_table()
+        items = []
+        while True:
+            response = await table.query(**query_params)
+            items.extend(response.get('Items', []))
+
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                return items
+            query_params['ExclusiveStartKey'] = last_evaluated_key
+
+    async def query_all_raw_items(self, **query_params) -> List[Dict]:
+        """低レベルクライアントでqueryの結果を全ページ分取得します（アイテムは低レベルAPI形式のまま返します）
+        Tableリソースは全属性を型変換するため、リクエスト毎に呼ばれる処理では必要な属性だけを呼び出し側で取り出す
+        ExpressionAttributeValuesも低レベルAPI形式（{'S': ...}, {'N': ...}）で指定すること
+        """
+        client = await self.get_client()
+        items = []
+        while True:
+            response = await client.query(TableName=self.table_name, **query_params)
+            items.extend(response.get('Items', []))
+
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                return items
+            query_params['ExclusiveStartKey'] = last_evaluated_key
+
+    async def count_all_items(self, **query_params) -> int:
+        """queryに一致するアイテム数を全ページ分数えます（Select='COUNT'のため、アイテム自体は返されない）"""
+        table = await self.get_table()
+        count = 0
+        while True:
+            response = await table.query(Select='COUNT', **query_params)
+            count += response.get('Count', 0)
+
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                return count
+            query_params['ExclusiveStartKey'] = last_evaluated_key
 
-    def get_item(self, key: dict) -> dict:
+    async def get_item(self, key: dict) -> dict:
         try:
-            response = self.table.get_item(Key=key)
+            table = await self.get_table()
+            response = await table.get_item(Key=key)
             return response.get('Item')
         except ClientError as e:
             logger.error(f"Error getting item: {str(e)}")
-            return None 
\ No newline at end of file
+            return None
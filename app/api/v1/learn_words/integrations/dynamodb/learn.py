@@ -4,13 +4,23 @@ from typing import Dict, Optional
 from botocore.exceptions import ClientError
 from decimal import Decimal
 from fastapi import HTTPException
-from .base import DynamoDBBase
+from .base import DynamoDBBase, user_pk
 from services.proficiency_service import ProficiencyService
 from services.mode_service import ModeService
 from services.datetime_service import DateTimeService
 
 logger = logging.getLogger(__name__)
 
+
+def _to_sortable_isoformat(dt: datetime) -> str:
+    """日時をUTC・マイクロ秒まで含む固定長のISO形式の文字列にします
+    next_datetimeはuser-next-datetime-index GSIのソートキーのため、文字列の順序と日時の順序が一致するようにする
+    （タイムゾーンなしの日時はUTCとして扱う）
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
 class LearnDynamoDB(DynamoDBBase):
     def __init__(self):
         super().__init__()
@@ -18,20 +28,21 @@ class LearnDynamoDB(DynamoDBBase):
         self.mode_service = ModeService()
         self.datetime_service = DateTimeService()
 
-    def calculate_proficiency(self, confidence: int, time: Decimal, current_data: Optional[Dict] = None) -> Decimal:
+    def calculate_proficiency(self, confidence: int, time: Decimal, current_data: Optional[Dict] = None, now: Optional[datetime] = None) -> Decimal:
         """習熟度を計算します"""
-        return self.proficiency_service.calculate_proficiency(confidence, time, current_data)
+        return self.proficiency_service.calculate_proficiency(confidence, time, current_data, now)
 
     def determine_next_mode(self, proficiency_MJ: Decimal, proficiency_JM: Decimal) -> str:
         """次の学習モードを決定します"""
         return self.mode_service.determine_next_mode(proficiency_MJ, proficiency_JM)
 
-    def get_current_learning_data(self, user_id: str, word_id: int) -> Optional[Dict]:
+    async def get_current_learning_data(self, user_id: str, word_id: int) -> Optional[Dict]:
         """現在の学習データを取得します"""
         try:
-            response = self.table.get_item(
+            table = await self.get_table()
+            response = await table.get_item(
                 Key={
-                    'PK': f"USER#{user_id}",
+                    'PK': user_pk(user_id),
                     'SK': f"WORD#{word_id}"
                 }
             )
@@ -47,36 +58,58 @@ class LearnDynamoDB(DynamoDBBase):
                                 proficiency_MJ: Decimal,
                                 proficiency_JM: Decimal,
                                 next_mode: str,
-                                next_datetime: datetime) -> Dict:
-        """学習データをDynamoDBに保存します（DB操作のみ）"""
+                                next_datetime: datetime,
+                                now: Optional[datetime] = None) -> Dict:
+        """学習データをDynamoDBに保存します（DB操作のみ）
+        nowを渡した場合はupdated_atとしてその時刻を保存します
+        put_itemで全体を置き換えず、update_itemで今回のモードの習熟度とnext_*のみを更新する
+        （もう一方のモードの習熟度は上書きしないため、同時に記録されても更新が失われない）
+        """
         try:
-            # DynamoDBに保存するアイテムを作成
-            item = {
-                'PK': f"USER#{user_id}",
-                'SK': f"WORD#{word_id}",
-                'user_id': user_id,
-                'word_id': word_id,
-                'level': level,
-                'proficiency_MJ': proficiency_MJ,
-                'proficiency_JM': proficiency_JM,
-                'next_mode': next_mode,
-                'next_datetime': next_datetime.isoformat(),
-                'updated_at': datetime.now(timezone.utc).isoformat()
-            }
+            # 今回のモードの習熟度のみ更新し、もう一方は未作成の場合のみ0で初期化する
+            if next_mode == "MJ":
+                updated_field, other_field, proficiency = 'proficiency_MJ', 'proficiency_JM', proficiency_MJ
+            else:
+                updated_field, other_field, proficiency = 'proficiency_JM', 'proficiency_MJ', proficiency_JM
             
-            # DynamoDBに保存
-            self.table.put_item(Item=item)
+            # DynamoDBを更新（アイテムがない場合は新規作成）
+            table = await self.get_table()
+            response = await table.update_item(
+                Key={
+                    'PK': user_pk(user_id),
+                    'SK': f"WORD#{word_id}"
+                },
+                UpdateExpression=(
+                    f"SET {updated_field} = :proficiency, "
+                    f"{other_field} = if_not_exists({other_field}, :zero), "
+                    "next_mode = :next_mode, next_datetime = :next_datetime, updated_at = :updated_at, "
+                    "#level = :level, user_id = :user_id, word_id = :word_id"
+                ),
+                ExpressionAttributeNames={'#level': 'level'},
+                ExpressionAttributeValues={
+                    ':proficiency': proficiency,
+                    ':zero': Decimal('0'),
+                    ':next_mode': next_mode,
+                    ':next_datetime': _to_sortable_isoformat(next_datetime),
+                    ':updated_at': (now or datetime.now(timezone.utc)).isoformat(),
+                    ':level': level,
+                    ':user_id': user_id,
+                    ':word_id': word_id
+                },
+                ReturnValues='ALL_NEW'
+            )
+            attributes = response.get('Attributes', {})
             
             return {
                 'user_id': user_id,
                 'word_id': word_id,
                 'level': level,
-                'proficiency_MJ': proficiency_MJ,
-                'proficiency_JM': proficiency_JM,
+                'proficiency_MJ': attributes.get('proficiency_MJ', proficiency_MJ),
+                'proficiency_JM': attributes.get('proficiency_JM', proficiency_JM),
                 'next_mode': next_mode,
                 'next_datetime': next_datetime
             }
             
         except Exception as e:
             logger.error(f"Error saving learning data: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
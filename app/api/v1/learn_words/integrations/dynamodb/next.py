@@ -1,125 +1,335 @@
+import asyncio
 import logging
-import boto3
-from boto3.dynamodb.types import TypeDeserializer
+import os
+import random
+import time
+from cachetools import LRUCache, TTLCache
+from decimal import Decimal
 from datetime import datetime, timezone
-from typing import Dict, Optional, List, Union
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, List, Sequence, Tuple, Union
 from botocore.exceptions import ClientError
 from fastapi import HTTPException
-from .base import DynamoDBBase
+from integrations import redis_cache
+from .base import DynamoDBBase, user_pk
 
 logger = logging.getLogger(__name__)
-deserializer = TypeDeserializer()
+
+# batch_get_itemの1リクエストあたりの最大キー数
+BATCH_GET_MAX_KEYS = 100
+# UnprocessedKeysの再試行回数と初回待機時間（指数バックオフ）
+BATCH_GET_MAX_RETRIES = 5
+BATCH_GET_BASE_DELAY_SECONDS = 0.05
+# ランダム出題用の単語IDプールの有効期間（期限切れ後は古いプールを返しつつバックグラウンドで更新）
+LEVEL_POOL_TTL_SECONDS = 3600
+# REVIEW_ALLの選択肢用の全単語IDプールの有効期間（単語数が多いため、環境変数で調整できるようにする）
+ALL_WORDS_POOL_TTL_SECONDS = int(os.getenv('ALL_WORDS_POOL_TTL_SECONDS', '600'))
+# プロセス内の単語詳細キャッシュの有効期間と、バックグラウンド更新を始める経過割合
+# （有効期間の80%を過ぎたら古い値を返しつつ更新し、有効期間を過ぎた値は使わない）
+WORD_DETAIL_TTL_SECONDS = 3600
+WORD_DETAIL_REFRESH_RATIO = 0.8
+# 存在しない単語IDを記録しておく期間（削除済みの単語への繰り返しの問い合わせを防ぐ。追加された単語はこの期間内に反映される）
+MISSING_WORD_TTL_SECONDS = 60
+# 出題単語の選択に使う学習履歴の属性（習熟度などは読み込まず、返却されるデータ量を減らす）
+USER_WORD_PROJECTION = "word_id, next_datetime, next_mode"
+# 学習履歴をnext_datetime順に並べたGSI（HASH: PK, RANGE: next_datetime）と、1回のqueryで読む件数
+# （PKには例文・かなの履歴も含まれ、FilterExpressionはLimit件を読んだ後に適用されるため、1件ではなく少し多めに読む）
+USER_NEXT_DATETIME_INDEX = 'user-next-datetime-index'
+EARLIEST_USER_WORD_PAGE_SIZE = 20
+# 単語詳細として取得する属性（リクエストごとに組み立てず、全リクエストで共有する）
+WORD_DETAIL_PROJECTION = "SK, #name, hiragana, is_katakana, #level, english, vietnamese, chinese, korean, indonesian, hindi, lexical_category, accent_up, accent_down"
+WORD_DETAIL_ATTRIBUTE_NAMES = {"#name": "name", "#level": "level"}
+# batch_get_itemのキーのパーティションキー（低レベルAPI形式。各キーで同じ値を共有する）
+WORD_PK_ATTRIBUTE = {"S": "WORD"}
+# 単語が見つからない場合の警告ログを出力する割合
+NOT_FOUND_LOG_SAMPLE_RATE = 0.01
+
+def _attr_str(item: Dict, name: str, default: Optional[str] = None) -> Optional[str]:
+    """低レベルAPI形式のアイテムから文字列属性を取り出します（属性がない・NULLの場合はdefault）"""
+    value = item.get(name)
+    if value is None:
+        return default
+    return value.get('S', default)
+
+def _attr_int(item: Dict, name: str, default: Optional[int] = None) -> Optional[int]:
+    """低レベルAPI形式のアイテムから数値（またはBOOL）属性をintとして取り出します（属性がない・NULLの場合はdefault）"""
+    value = item.get(name)
+    if value is None:
+        return default
+    if 'N' in value:
+        return int(Decimal(value['N']))
+    if 'BOOL' in value:
+        return int(value['BOOL'])
+    return default
+
+def _unpack_user_word(item: Dict) -> Dict:
+    """低レベルAPI形式の学習履歴（USER_WORD_PROJECTIONの属性のみ）を辞書に変換します（word_idはintにします）"""
+    word = {}
+    word_id = _attr_int(item, "word_id")
+    if word_id is not None:
+        word["word_id"] = word_id
+    for name in ("next_datetime", "next_mode"):
+        value = _attr_str(item, name)
+        if value is not None:
+            word[name] = value
+    return word
+
+def _unpack_word_sk(item: Dict) -> Dict:
+    """低レベルAPI形式の単語アイテム（SKのみ取得）を {'SK': 単語ID} の辞書に変換します"""
+    return {'SK': item['SK']['S']}
+
+def _normalize_word(item: Dict) -> Dict:
+    """batch_get_itemの低レベルAPI形式の単語アイテムを、レスポンス用の辞書に変換します
+    取得する属性はProjectionExpressionで固定のため、TypeDeserializerで全属性を変換せず、必要な属性を直接取り出します
+    変換はここで一度だけ行い、キャッシュには変換後の辞書を保存します
+    キャッシュヒット時は同じ辞書を参照で返すため、呼び出し側で変更しないこと
+    （MappingProxyTypeで凍結するとorjson・msgpackでシリアライズできないため、dictのまま保持する）
+    """
+    return {
+        "id": int(item['SK']['S']),
+        "name": _attr_str(item, "name", ""),
+        "hiragana": _attr_str(item, "hiragana", ""),
+        "is_katakana": bool(_attr_int(item, "is_katakana", 0)),
+        "level": _attr_int(item, "level", 0),
+        "english": _attr_str(item, "english"),
+        "vietnamese": _attr_str(item, "vietnamese"),
+        "chinese": _attr_str(item, "chinese"),
+        "korean": _attr_str(item, "korean"),
+        "indonesian": _attr_str(item, "indonesian"),
+        "hindi": _attr_str(item, "hindi"),
+        "lexical_category": _attr_str(item, "lexical_category", ""),
+        "accent_up": _attr_int(item, "accent_up"),
+        "accent_down": _attr_int(item, "accent_down")
+    }
+
+class BatchGetIncompleteError(Exception):
+    """batch_get_itemの再試行後もUnprocessedKeysが残った場合の例外"""
 
 class NextDynamoDB(DynamoDBBase):
-    def __init__(self):
-        super().__init__()
-        # batch_get_item用にclientも初期化
-        self.dynamodb_client = boto3.client('dynamodb')
+    # 単語詳細はほぼ更新されない参照データのため、プロセス内でキャッシュする（インスタンス間で共有）
+    # word_id -> (単語詳細, 取得時刻)。期限切れ間近の値を返せるよう、TTLCacheではなく取得時刻を自前で管理する
+    _word_detail_cache: LRUCache = LRUCache(maxsize=5000)
+    # 存在しなかった単語ID（ネガティブキャッシュ。短いTTLで保持する）
+    _missing_word_ids: TTLCache = TTLCache(maxsize=1024, ttl=MISSING_WORD_TTL_SECONDS)
+    # レベル別の単語リストは単語の追加・削除時のみ変わるため、長めのTTLでキャッシュする
+    _level_words_cache: TTLCache = TTLCache(maxsize=32, ttl=86400)
+    # ランダム出題用のレベル別単語IDプール（level -> (単語IDのタプル, 取得時刻)）
+    _level_pools: Dict[int, Tuple[Tuple[int, ...], float]] = {}
+    # REVIEW_ALLの選択肢用の全単語IDプール（(単語IDのタプル, 取得時刻)）
+    _all_words_pool: Optional[Tuple[Tuple[int, ...], float]] = None
+    # 実行中の取得処理（同じキーへの同時アクセスは1回の取得結果を共有する）
+    _inflight: Dict[tuple, asyncio.Future] = {}
+    # バックグラウンド更新タスク（GCで破棄されないよう参照を保持する）
+    _background_tasks: set = set()
 
-    async def get_word_detail(self, word_id: int) -> Optional[dict]:
-        """DynamoDBから単語詳細を取得。単語が見つからない場合はNoneを返す
-        ProjectionExpressionを使用してembeddingフィールドを除外し、必要なフィールドのみを取得します。
+    async def _single_flight(self, key: tuple, fetch: Callable[..., Awaitable[Any]], *args) -> Any:
+        """同じキーの取得が実行中であればその結果を待ち、なければfetchを実行します（single-flight）
+        キャッシュが空の状態でアクセスが集中しても、DynamoDBへの取得はキー毎に1回で済みます
         """
+        future = self._inflight.get(key)
+        if future is not None:
+            # 待機側がキャンセルされても、実行中の取得処理はキャンセルしない
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
         try:
-            response = self.table.get_item(
-                Key={
-                    'PK': "WORD",
-                    'SK': str(word_id)
-                },
-                ProjectionExpression="SK, #name, hiragana, is_katakana, #level, english, vietnamese, chinese, korean, indonesian, hindi, lexical_category, accent_up, accent_down",
-                ExpressionAttributeNames={
-                    "#name": "name",
-                    "#level": "level"
-                }
-            )
-            item = response.get('Item')
-            if not item:
-                logger.warning(f"Word {word_id} not found in DynamoDB")
-                return None
-            
-            return {
-                "id": int(item['SK']),
-                "name": item.get("name", ""),
-                "hiragana": item.get("hiragana", ""),
-                "is_katakana": bool(int(item.get("is_katakana", 0))),
-                "level": int(item.get("level", 0)),
-                "english": item.get("english"),
-                "vietnamese": item.get("vietnamese"),
-                "chinese": item.get("chinese"),
-                "korean": item.get("korean"),
-                "indonesian": item.get("indonesian"),
-                "hindi": item.get("hindi"),
-                "lexical_category": item.get("lexical_category", ""),
-                "accent_up": int(item.get("accent_up")) if item.get("accent_up") else None,
-                "accent_down": int(item.get("accent_down")) if item.get("accent_down") else None
-            }
+            result = await fetch(*args)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
         except Exception as e:
-            error_msg = f"Error getting word detail for word_id {word_id}: {str(e)}"
-            logger.error(error_msg, exc_info=True)
+            future.set_exception(e)
+            # 待機側がいない場合に「例外が取得されなかった」警告が出ないよう取得済みにする
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _run_in_background(self, key: tuple, fetch: Callable[..., Awaitable[Any]], *args) -> None:
+        """fetchをバックグラウンドで実行します（同じキーの取得が実行中の場合は何もしない）"""
+        if key in self._inflight:
+            return
+
+        async def _run():
+            try:
+                await self._single_flight(key, fetch, *args)
+            except Exception as e:
+                logger.error(f"Error refreshing {key} in background: {str(e)}", exc_info=True)
+
+        task = asyncio.create_task(_run())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _get_cached_word_detail(self, word_id: int) -> Optional[dict]:
+        """プロセス内キャッシュから単語詳細を取得します（stale-while-revalidate）
+        有効期間の80%を過ぎた値はそのまま返しつつバックグラウンドで更新し、有効期間を過ぎた値はNoneとして扱います
+        """
+        entry = self._word_detail_cache.get(word_id)
+        if entry is None:
             return None
 
-    async def batch_get_word_details(self, word_ids: List[int]) -> Dict[int, Optional[dict]]:
-        """複数の単語詳細を一度に取得します（batch_get_itemを使用）
+        word, cached_at = entry
+        age = time.monotonic() - cached_at
+        if age >= WORD_DETAIL_TTL_SECONDS:
+            return None
+        if age >= WORD_DETAIL_TTL_SECONDS * WORD_DETAIL_REFRESH_RATIO:
+            self._run_in_background(('word_detail_refresh', word_id), self._refresh_word_detail, word_id)
+        return word
+
+    def _cache_word_detail(self, word_id: int, word: dict) -> None:
+        self._word_detail_cache[word_id] = (word, time.monotonic())
+        self._missing_word_ids.pop(word_id, None)
+
+    def _cache_missing_word(self, word_id: int) -> None:
+        self._word_detail_cache.pop(word_id, None)
+        self._missing_word_ids[word_id] = True
+
+    async def _refresh_word_detail(self, word_id: int) -> None:
+        """DynamoDBから単語詳細を再取得し、プロセス内キャッシュとRedisを更新します
+        取得に失敗した場合は例外が送出され、キャッシュ済みの値はそのまま残る
+        """
+        word = await self._fetch_word_detail(word_id)
+        if word is None:
+            self._cache_missing_word(word_id)
+            return
+        self._cache_word_detail(word_id, word)
+        await redis_cache.set_many({redis_cache.word_detail_key(word_id): word}, redis_cache.WORD_DETAIL_TTL_SECONDS)
+
+    async def get_word_detail(self, word_id: int) -> Optional[dict]:
+        """単語詳細を取得します（キャッシュにない場合のみDynamoDBから取得）。単語が見つからない場合はNoneを返す"""
+        word_id = int(word_id)
+        cached = self._get_cached_word_detail(word_id)
+        if cached is not None:
+            return cached
+        if word_id in self._missing_word_ids:
+            return None
+
+        return await self._single_flight(('word_detail', word_id), self._load_word_detail, word_id)
+
+    async def _load_word_detail(self, word_id: int) -> Optional[dict]:
+        """Redis・DynamoDBから単語詳細を取得し、プロセス内キャッシュに保存します"""
+        word = await self._get_word_detail_from_redis(word_id)
+        if word is not None:
+            self._cache_word_detail(word_id, word)
+        else:
+            self._cache_missing_word(word_id)
+        return word
+
+    async def _get_word_detail_from_redis(self, word_id: int) -> Optional[dict]:
+        """Redis（L2キャッシュ）から単語詳細を取得し、なければDynamoDBから取得してRedisに保存します"""
+        key = redis_cache.word_detail_key(word_id)
+        (word,) = await redis_cache.get_many([key])
+        if word is not None:
+            return word
+
+        locked = await redis_cache.acquire_lock(key)
+        if not locked:
+            # 他のワーカーが取得中のため、少し待ってから再度Redisを確認する
+            await asyncio.sleep(0.05)
+            (word,) = await redis_cache.get_many([key])
+            if word is not None:
+                return word
+
+        try:
+            word = await self._fetch_word_detail(word_id)
+            if word is not None:
+                await redis_cache.set_many({key: word}, redis_cache.WORD_DETAIL_TTL_SECONDS)
+            return word
+        finally:
+            if locked:
+                await redis_cache.release_lock(key)
+
+    async def _fetch_word_detail(self, word_id: int) -> Optional[dict]:
+        """DynamoDBから単語詳細を取得。単語が見つからない場合はNoneを返す"""
+        result = await self._batch_fetch_word_details([word_id])
+        word = result.get(word_id)
+        if word is None:
+            # データ不整合の検知用のため、毎回ではなくサンプリングして出力する
+            if random.random() < NOT_FOUND_LOG_SAMPLE_RATE:
+                logger.warning("Word %s not found in DynamoDB (sampled)", word_id)
+        return word
+
+    async def batch_get_word_details(self, word_ids: Sequence[int]) -> Dict[int, Optional[dict]]:
+        """複数の単語詳細を一度に取得します（キャッシュにない単語のみbatch_get_itemで取得）
         
         Args:
             word_ids: 取得する単語IDのリスト
             
         Returns:
-            word_idをキー、単語詳細（またはNone）を値とする辞書
+            word_idをキー、単語詳細（またはNone）を値とする辞書。
+            単語詳細はキャッシュと共有しているため、呼び出し側で変更しないこと
         """
         if not word_ids:
             return {}
-        
+
+        result = {}
+        missing_word_ids = []
+        for word_id in word_ids:
+            cached = self._get_cached_word_detail(word_id)
+            if cached is not None:
+                result[word_id] = cached
+            elif word_id in self._missing_word_ids:
+                result[word_id] = None
+            else:
+                missing_word_ids.append(word_id)
+
+        if not missing_word_ids:
+            return result
+
+        # Redis（L2キャッシュ）からMGETで一度に取得
+        keys = [redis_cache.word_detail_key(word_id) for word_id in missing_word_ids]
+        redis_words = await redis_cache.get_many(keys)
+        dynamodb_word_ids = []
+        for word_id, word in zip(missing_word_ids, redis_words):
+            if word is not None:
+                self._cache_word_detail(word_id, word)
+                result[word_id] = word
+            else:
+                dynamodb_word_ids.append(word_id)
+
+        # Redisにもない単語のみDynamoDBから取得
+        if dynamodb_word_ids:
+            fetched = await self._batch_fetch_word_details(dynamodb_word_ids)
+            for word_id, word in fetched.items():
+                if word is not None:
+                    self._cache_word_detail(word_id, word)
+                else:
+                    self._cache_missing_word(word_id)
+                result[word_id] = word
+            await redis_cache.set_many(
+                {redis_cache.word_detail_key(word_id): word for word_id, word in fetched.items() if word is not None},
+                redis_cache.WORD_DETAIL_TTL_SECONDS
+            )
+        return result
+
+    async def _batch_fetch_word_details(self, word_ids: List[int]) -> Dict[int, Optional[dict]]:
+        """複数の単語詳細をDynamoDBから一度に取得します（batch_get_itemを使用）
+        Noneは「DynamoDBが存在しないと応答した単語」のみを表す（ネガティブキャッシュの対象になるため）
+        スロットリング・タイムアウト等で応答が得られなかった場合は例外をそのまま送出する
+        """
         try:
-            # DynamoDBのbatch_get_itemは最大100アイテムまで
-            # 通常は4つ程度なので問題なし
-            keys = [
-                {
-                    'PK': {"S": "WORD"},
-                    'SK': {"S": str(word_id)}
-                }
-                for word_id in word_ids
-            ]
-            
-            # batch_get_itemを使用（boto3.clientを使用）
-            response = self.dynamodb_client.batch_get_item(
-                RequestItems={
-                    self.table_name: {
-                        'Keys': keys,
-                        'ProjectionExpression': "SK, #name, hiragana, is_katakana, #level, english, vietnamese, chinese, korean, indonesian, hindi, lexical_category, accent_up, accent_down",
-                        'ExpressionAttributeNames': {
-                            "#name": "name",
-                            "#level": "level"
-                        }
+            # DynamoDBのbatch_get_itemは重複キーを受け付けず、1回あたり最大100キーまでのため重複を除いて分割して取得
+            unique_word_ids = list(dict.fromkeys(word_ids))
+            items = []
+            for start in range(0, len(unique_word_ids), BATCH_GET_MAX_KEYS):
+                keys = [
+                    {
+                        'PK': WORD_PK_ATTRIBUTE,
+                        'SK': {"S": str(word_id)}
                     }
-                }
-            )
+                    for word_id in unique_word_ids[start:start + BATCH_GET_MAX_KEYS]
+                ]
+                items.extend(await self._batch_get_items(keys))
             
             # レスポンスをword_idをキーとする辞書に変換
-            items = response.get('Responses', {}).get(self.table_name, [])
             result = {}
             
             # 取得できたアイテムを変換（DynamoDBの低レベルAPI形式から高レベル形式に変換）
             for item in items:
-                # TypeDeserializerで低レベルAPI形式を高レベル形式に変換
-                deserialized_item = {k: deserializer.deserialize(v) for k, v in item.items()}
-                word_id = int(deserialized_item['SK'])
-                result[word_id] = {
-                    "id": word_id,
-                    "name": deserialized_item.get("name", ""),
-                    "hiragana": deserialized_item.get("hiragana", ""),
-                    "is_katakana": bool(int(deserialized_item.get("is_katakana", 0))),
-                    "level": int(deserialized_item.get("level", 0)),
-                    "english": deserialized_item.get("english"),
-                    "vietnamese": deserialized_item.get("vietnamese"),
-                    "chinese": deserialized_item.get("chinese"),
-                    "korean": deserialized_item.get("korean"),
-                    "indonesian": deserialized_item.get("indonesian"),
-                    "hindi": deserialized_item.get("hindi"),
-                    "lexical_category": deserialized_item.get("lexical_category", ""),
-                    "accent_up": int(deserialized_item["accent_up"]) if deserialized_item.get("accent_up") is not None else None,
-                    "accent_down": int(deserialized_item["accent_down"]) if deserialized_item.get("accent_down") is not None else None
-                }
+                word = _normalize_word(item)
+                result[word["id"]] = word
             
             # 取得できなかったword_idはNoneとして設定
             for word_id in word_ids:
@@ -128,112 +338,287 @@ class NextDynamoDB(DynamoDBBase):
             
             return result
         except Exception as e:
-            logger.error(f"Error batch getting word details: {str(e)}", exc_info=True)
-            # エラー時は全てNoneを返す
-            return {word_id: None for word_id in word_ids}
+            logger.error(f"Error batch getting word details: {str(e)}")
+            raise
+
+    async def _batch_get_items(self, keys: List[Dict]) -> List[Dict]:
+        """batch_get_itemで単語を取得します（低レベルAPI形式のアイテムを返します）
+        UnprocessedKeysが返された場合は指数バックオフで再試行し、再試行後も残った場合は例外を送出します
+        （未処理のキーを「存在しない単語」として扱わないため）
+        """
+        client = await self.get_client()
+        items = []
+        request_items = {
+            self.table_name: {
+                'Keys': keys,
+                'ProjectionExpression': WORD_DETAIL_PROJECTION,
+                'ExpressionAttributeNames': WORD_DETAIL_ATTRIBUTE_NAMES
+            }
+        }
+        for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+            response = await client.batch_get_item(RequestItems=request_items)
+            items.extend(response.get('Responses', {}).get(self.table_name, []))
+
+            request_items = response.get('UnprocessedKeys')
+            if not request_items:
+                return items
+            if attempt < BATCH_GET_MAX_RETRIES:
+                await asyncio.sleep(BATCH_GET_BASE_DELAY_SECONDS * (2 ** attempt))
+
+        unprocessed_count = len(request_items.get(self.table_name, {}).get('Keys', []))
+        raise BatchGetIncompleteError(
+            f"batch_get_item left {unprocessed_count} unprocessed keys after {BATCH_GET_MAX_RETRIES} retries"
+        )
 
     async def _get_level_words(self, level: int) -> List[Dict]:
-        """指定されたレベルの単語を取得します（word-level-index GSIを使用）"""
-        try:
-            all_words = []
-            last_evaluated_key = None
-
-            while True:
-                query_params = {
-                    'IndexName': 'word-level-index',
-                    'KeyConditionExpression': "PK = :pk AND #level = :level",
-                    'ExpressionAttributeNames': {"#level": "level"},
-                    'ExpressionAttributeValues': {
-                        ":pk": "WORD",
-                        ":level": int(level)
-                    },
-                    # embeddingフィールドを除外してデータサイズを削減
-                    'ProjectionExpression': "PK, SK",
-                }
-                if last_evaluated_key:
-                    query_params['ExclusiveStartKey'] = last_evaluated_key
+        """指定されたレベルの単語を取得します（プロセス内キャッシュ → Redis → DynamoDBの順に参照）
+        返すリストはキャッシュと共有しているため、呼び出し側で変更しないこと
+        """
+        level = int(level)
+        cached = self._level_words_cache.get(level)
+        if cached is not None:
+            return cached
+
+        return await self._single_flight(('level_words', level), self._load_level_words, level)
+
+    async def _load_level_words(self, level: int) -> List[Dict]:
+        """Redis・DynamoDBからレベル別の単語を取得し、プロセス内キャッシュに保存します"""
+        # Redisには単語IDのみを保存している
+        key = redis_cache.level_words_key(level)
+        (word_sks,) = await redis_cache.get_many([key])
+        if word_sks is None:
+            return await self._reload_level_words(level)
+
+        level_words = [{'SK': sk} for sk in word_sks]
+        if level_words:
+            self._level_words_cache[level] = level_words
+        return level_words
+
+    async def _reload_level_words(self, level: int) -> List[Dict]:
+        """キャッシュを参照せずにDynamoDBからレベル別の単語を取得し、Redis・プロセス内キャッシュを更新します"""
+        level_words = await self._query_level_words(level)
+        if level_words:
+            await redis_cache.set_many(
+                {redis_cache.level_words_key(level): [item['SK'] for item in level_words]},
+                redis_cache.LEVEL_WORDS_TTL_SECONDS
+            )
+            self._level_words_cache[level] = level_words
+        return level_words
+
+    async def get_level_pool(self, level: int) -> Tuple[int, ...]:
+        """ランダム出題用に、指定されたレベルの単語IDのタプルを返します
+        有効期限が切れている場合は古いプールをそのまま返し、バックグラウンドでDynamoDBから取得し直します
+        """
+        level = int(level)
+        entry = self._level_pools.get(level)
+        if entry is None:
+            return await self._refresh_level_pool(level)
+
+        pool, loaded_at = entry
+        if time.monotonic() - loaded_at > LEVEL_POOL_TTL_SECONDS:
+            self._run_in_background(('level_pool', level), self._load_level_pool, level, True)
+        return pool
+
+    async def _refresh_level_pool(self, level: int, from_source: bool = False) -> Tuple[int, ...]:
+        return await self._single_flight(('level_pool', level), self._load_level_pool, level, from_source)
+
+    async def prefetch_level_pools(self, levels: Iterable[int], from_source: bool = False) -> None:
+        """指定された全レベルの単語IDプールを並行して取得します（キャッシュのウォームアップ用）
+        from_source=Trueの場合は、単語リストのキャッシュを参照せずにDynamoDBから取得し直します
+        一部のレベルの取得に失敗しても他のレベルの取得は続行します
+        """
+        levels = [int(level) for level in levels]
+        results = await asyncio.gather(
+            *(self._refresh_level_pool(level, from_source) for level in levels),
+            return_exceptions=True
+        )
+        for level, result in zip(levels, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error prefetching word pool for level {level}: {str(result)}")
+
+    def prefetch_level_pools_in_background(self, levels: Iterable[int]) -> None:
+        """全レベルの単語IDプールの取得をバックグラウンドで開始します"""
+        self._run_in_background(('prefetch_level_pools',), self.prefetch_level_pools, tuple(levels))
+
+    async def refresh_level_pools_periodically(self, levels: Iterable[int]) -> None:
+        """LEVEL_POOL_TTL_SECONDSごとに全レベルの単語IDプールをDynamoDBから取得し直します（キャンセルされるまで続ける）
+        単語リストのキャッシュ（プロセス内・Redis）は24時間有効なため、それを経由せずに取得し、キャッシュも更新する
+        """
+        levels = tuple(levels)
+        while True:
+            await asyncio.sleep(LEVEL_POOL_TTL_SECONDS)
+            await self.prefetch_level_pools(levels, from_source=True)
+
+    async def _load_level_pool(self, level: int, from_source: bool = False) -> Tuple[int, ...]:
+        """レベル別の単語リストから単語IDのプールを作成します
+        from_source=Trueの場合は、単語リストのキャッシュを参照せずにDynamoDBから取得します
+        """
+        if from_source:
+            level_words = await self._reload_level_words(level)
+        else:
+            level_words = await self._get_level_words(level)
+        pool = tuple(int(item['SK']) for item in level_words)
+        if pool:
+            self._level_pools[level] = (pool, time.monotonic())
+        return pool
+
+    async def get_all_words_pool(self) -> Tuple[int, ...]:
+        """REVIEW_ALLの選択肢用に、全単語IDのタプルを返します
+        有効期限が切れている場合は古いプールをそのまま返し、バックグラウンドで更新します
+        """
+        entry = NextDynamoDB._all_words_pool
+        if entry is None:
+            return await self._single_flight(('all_words_pool',), self._load_all_words_pool)
+
+        pool, loaded_at = entry
+        if time.monotonic() - loaded_at > ALL_WORDS_POOL_TTL_SECONDS:
+            self._run_in_background(('all_words_pool',), self._load_all_words_pool)
+        return pool
 
-                response = self.table.query(**query_params)
-                all_words.extend(response.get('Items', []))
+    async def _load_all_words_pool(self) -> Tuple[int, ...]:
+        """全単語から単語IDのプールを作成します"""
+        all_words = await self._get_all_words()
+        pool = tuple(int(item['SK']) for item in all_words)
+        if pool:
+            NextDynamoDB._all_words_pool = (pool, time.monotonic())
+        return pool
 
-                last_evaluated_key = response.get('LastEvaluatedKey')
-                if not last_evaluated_key:
-                    break
+    @classmethod
+    async def invalidate_level_words(cls, level: int) -> None:
+        """レベル別単語リストのキャッシュ（プロセス内・Redis）を削除します（全単語IDプールも破棄します）"""
+        cls._level_words_cache.pop(int(level), None)
+        cls._level_pools.pop(int(level), None)
+        cls._missing_word_ids.clear()
+        NextDynamoDB._all_words_pool = None
+        await redis_cache.delete_many([redis_cache.level_words_key(int(level))])
+
+    async def _query_level_words(self, level: int) -> List[Dict]:
+        """指定されたレベルの単語をDynamoDBから取得します（word-level-index GSIを使用）
+        返す各アイテムは {'SK': 単語ID} のみ。単語詳細が必要な場合はget_word_detail等で取得すること
+        """
+        try:
+            items = await self.query_all_raw_items(
+                IndexName='word-level-index',
+                KeyConditionExpression="PK = :pk AND #level = :level",
+                ExpressionAttributeNames={"#level": "level"},
+                ExpressionAttributeValues={
+                    ":pk": {'S': "WORD"},
+                    ":level": {'N': str(int(level))}
+                },
+                # 候補選定には単語ID（SK）のみ使うため、SKだけを取得してデータサイズを削減
+                ProjectionExpression="SK"
+            )
+            all_words = [_unpack_word_sk(item) for item in items]
 
             if not all_words:
-                logger.info(f"No words found for level {level}")
+                logger.debug("No words found for level %s", level)
                 return []
 
-            logger.info(f"Successfully retrieved {len(all_words)} words for level {level}")
+            logger.debug("Successfully retrieved %d words for level %s", len(all_words), level)
             return all_words
         except Exception as e:
             logger.error(f"Error getting words for level {level}: {str(e)}")
             raise
 
     async def _get_user_words(self, user_id: str) -> List[Dict]:
-        """ユーザーの学習履歴を取得します"""
-        response = self.table.query(
+        """ユーザーの学習履歴を全件取得します（低レベルクライアントで取得し、必要な属性のみ変換）"""
+        items = await self.query_all_raw_items(
             KeyConditionExpression='PK = :pk AND begins_with(SK, :sk_prefix)',
             ExpressionAttributeValues={
-                ':pk': f"USER#{user_id}",
-                ':sk_prefix': 'WORD#'
+                ':pk': {'S': user_pk(user_id)},
+                ':sk_prefix': {'S': 'WORD#'}
+            },
+            ProjectionExpression=USER_WORD_PROJECTION
+        )
+        return [_unpack_user_word(item) for item in items]
+
+    async def count_reviewable_user_words(self, user_id: str, now: datetime) -> int:
+        """復習可能な（next_datetimeがnow以前の）単語の学習履歴の件数を数えます
+        判定はFilterExpressionでDynamoDB側で行い、件数のみを受け取る（学習履歴自体は転送しない）
+        next_datetimeはUTCのISO形式で保存しているため、文字列の比較で日時の前後を判定できる
+        """
+        return await self.count_all_items(
+            KeyConditionExpression='PK = :pk AND begins_with(SK, :sk_prefix)',
+            FilterExpression='next_datetime <= :now',
+            ExpressionAttributeValues={
+                ':pk': user_pk(user_id),
+                ':sk_prefix': 'WORD#',
+                ':now': now.astimezone(timezone.utc).isoformat(timespec='microseconds')
             }
         )
-        return response.get('Items', [])
+
+    async def _get_earliest_user_word(self, user_id: str) -> Optional[Dict]:
+        """next_datetimeが最も早い単語の学習履歴を1件取得します（user-next-datetime-index GSIを使用）
+        全件を取得してPython側で最小値を探さず、DynamoDB側でnext_datetime順に並べて先頭から読む
+        """
+        table = await self.get_table()
+        query_params = {
+            'IndexName': USER_NEXT_DATETIME_INDEX,
+            'KeyConditionExpression': 'PK = :pk',
+            'FilterExpression': 'begins_with(SK, :sk_prefix)',
+            'ProjectionExpression': USER_WORD_PROJECTION,
+            'ExpressionAttributeValues': {
+                ':pk': user_pk(user_id),
+                ':sk_prefix': 'WORD#'
+            },
+            'ScanIndexForward': True,
+            'Limit': EARLIEST_USER_WORD_PAGE_SIZE
+        }
+        while True:
+            response = await table.query(**query_params)
+            items = response.get('Items', [])
+            if items:
+                return items[0]
+
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                return None
+            query_params['ExclusiveStartKey'] = last_evaluated_key
 
     async def _get_user_words_by_level(self, user_id: str, level: int) -> List[Dict]:
-        """指定されたユーザーとレベルの学習履歴を取得します（user-level-index GSIを使用）"""
+        """指定されたユーザーとレベルの学習履歴を取得します（user-level-index GSIを使用）
+        低レベルクライアントで取得し、必要な属性のみ変換します
+        """
         try:
-            response = self.table.query(
+            items = await self.query_all_raw_items(
                 IndexName='user-level-index',
                 KeyConditionExpression='PK = :pk AND #level = :level',
+                # SKがWORD#で始まるものだけをDynamoDB側でフィルタリング（GSIのソートキーがlevelのため、キー条件ではなくフィルタで指定）
+                FilterExpression='begins_with(SK, :sk_prefix)',
+                ProjectionExpression=USER_WORD_PROJECTION,
                 ExpressionAttributeNames={
                     '#level': 'level'
                 },
                 ExpressionAttributeValues={
-                    ':pk': f"USER#{user_id}",
-                    ':level': int(level)
+                    ':pk': {'S': user_pk(user_id)},
+                    ':level': {'N': str(int(level))},
+                    ':sk_prefix': {'S': 'WORD#'}
                 }
             )
-            user_level_words = response.get('Items', [])
-            # SKがWORD#で始まるものだけをフィルタリング（念のため）
-            filtered_words = [
-                item for item in user_level_words 
-                if item.get('SK', '').startswith('WORD#')
-            ]
+            filtered_words = [_unpack_user_word(item) for item in items]
             if not filtered_words:
-                logger.info(f"No learning history found for user {user_id}, level {level}")
+                logger.debug("No learning history found for user %s, level %s", user_id, level)
                 return []
             
-            logger.info(f"Successfully retrieved {len(filtered_words)} learning history items for user {user_id}, level {level}")
+            logger.debug("Successfully retrieved %d learning history items for user %s, level %s", len(filtered_words), user_id, level)
             return filtered_words
         except Exception as e:
             logger.error(f"Error getting user words for user {user_id}, level {level}: {str(e)}")
             raise
 
     async def _get_all_words(self) -> List[Dict]:
-        """全単語を取得します"""
-        try:
-            all_words = []
-            last_evaluated_key = None
-
-            while True:
-                query_params = {
-                    'KeyConditionExpression': "PK = :pk",
-                    'ExpressionAttributeValues': {":pk": "WORD"},
-                    'ProjectionExpression': "PK, SK",
-                }
-                if last_evaluated_key:
-                    query_params['ExclusiveStartKey'] = last_evaluated_key
-
-                response = self.table.query(**query_params)
-                all_words.extend(response.get('Items', []))
-
-                last_evaluated_key = response.get('LastEvaluatedKey')
-                if not last_evaluated_key:
-                    break
+        """全単語を取得します（各アイテムは {'SK': 単語ID} のみ）"""
+        return await self._single_flight(('all_words',), self._query_all_words)
 
-            return all_words
+    async def _query_all_words(self) -> List[Dict]:
+        """全単語をDynamoDBから取得します"""
+        try:
+            items = await self.query_all_raw_items(
+                KeyConditionExpression="PK = :pk",
+                ExpressionAttributeValues={":pk": {'S': "WORD"}},
+                ProjectionExpression="SK"
+            )
+            return [_unpack_word_sk(item) for item in items]
         except Exception as e:
             logger.error(f"Error getting all words: {str(e)}")
             raise 
\ No newline at end of file
@@ -0,0 +1,95 @@
+import os
+import logging
+from typing import Dict, List, Optional
+import msgpack
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# REDIS_URLが設定されている場合のみ有効（未設定の場合は全ての操作が何もしない）
+REDIS_URL = os.getenv('REDIS_URL')
+# 値はmsgpackで保存する（JSON形式だったv1のキーとは混在させない）
+KEY_PREFIX = 'v2'
+WORD_DETAIL_TTL_SECONDS = 86400
+LEVEL_WORDS_TTL_SECONDS = 86400
+LOCK_TTL_SECONDS = 5
+
+_redis: Optional[aioredis.Redis] = None
+
+
+def get_redis() -> Optional[aioredis.Redis]:
+    """共有のRedisクライアントを取得します（REDIS_URL未設定の場合はNone）"""
+    global _redis
+    if _redis is None and REDIS_URL:
+        _redis = aioredis.from_url(REDIS_URL, socket_timeout=0.2, socket_connect_timeout=0.2)
+    return _redis
+
+
+def word_detail_key(word_id: int) -> str:
+    return f"{KEY_PREFIX}:word:detail:{word_id}"
+
+
+def level_words_key(level: int) -> str:
+    return f"{KEY_PREFIX}:words:level:{level}"
+
+
+async def get_many(keys: List[str]) -> List[Optional[object]]:
+    """複数のキーをMGETで一度に取得します。Redisのエラー時は全てNone（DynamoDBにフォールバック）"""
+    client = get_redis()
+    if client is None or not keys:
+        return [None] * len(keys)
+    try:
+        values = await client.mget(keys)
+        return [msgpack.unpackb(value, raw=False) if value is not None else None for value in values]
+    except (RedisError, OSError, ValueError) as e:
+        logger.warning(f"Redis MGET failed, falling back to DynamoDB: {str(e)}")
+        return [None] * len(keys)
+
+
+async def set_many(values: Dict[str, object], ttl: int) -> None:
+    """複数のキーをパイプラインでまとめて保存します。Redisのエラーは無視します"""
+    client = get_redis()
+    if client is None or not values:
+        return
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, msgpack.packb(value, use_bin_type=True), ex=ttl)
+            await pipe.execute()
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis SET failed: {str(e)}")
+
+
+async def delete_many(keys: List[str]) -> None:
+    """複数のキーを削除します。Redisのエラーは無視します"""
+    client = get_redis()
+    if client is None or not keys:
+        return
+    try:
+        await client.delete(*keys)
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis DEL failed: {str(e)}")
+
+
+async def acquire_lock(key: str) -> bool:
+    """SET NXでキャッシュ再構築用のロックを取得します（Redis無効・エラー時はTrue）"""
+    client = get_redis()
+    if client is None:
+        return True
+    try:
+        return bool(await client.set(f"{key}:lock", b"1", nx=True, ex=LOCK_TTL_SECONDS))
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis lock failed: {str(e)}")
+        return True
+
+
+async def release_lock(key: str) -> None:
+    """キャッシュ再構築用のロックを解放します"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.delete(f"{key}:lock")
+    except (RedisError, OSError) as e:
+        logger.warning(f"Redis unlock failed: {str(e)}")
@@ -6,10 +6,21 @@ from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# 習熟度（0-1）を分割する段階数。習熟度ごとの学習間隔は起動時に計算しておく
+# （隣り合う段階の間隔の差は約0.5%で、最も近い段階に丸めるため誤差は約0.3%以内）
+PROFICIENCY_STEPS = 1024
+
+
+def _build_interval_minutes(base_hours: int) -> tuple:
+    """習熟度の段階ごとの基本の学習間隔（分）を計算します：base_hours * 60 * 2**(8*習熟度)"""
+    return tuple(base_hours * 60 * 2 ** (8 * step / PROFICIENCY_STEPS) for step in range(PROFICIENCY_STEPS + 1))
+
 class DateTimeService:
     # 定数
     BASE_HOURS = 6 # 基準となる間隔（6時間） 
-    def calculate_next_datetime(self, confidence: int, next_mode: str, proficiency_MJ: Decimal, proficiency_JM: Decimal, reviewable_count: int = 0) -> datetime:
+    # 習熟度の段階ごとの基本の学習間隔（分）
+    INTERVAL_MINUTES = _build_interval_minutes(BASE_HOURS)
+    def calculate_next_datetime(self, confidence: int, next_mode: str, proficiency_MJ: Decimal, proficiency_JM: Decimal, reviewable_count: int = 0, now: Optional[datetime] = None) -> datetime:
         """次の学習時間を計算します
         
         Args:
@@ -18,26 +29,27 @@ class DateTimeService:
             proficiency_MJ: MJモードの習熟度（0-1）
             proficiency_JM: JMモードの習熟度（0-1）
             reviewable_count: 現在の復習可能単語数（デフォルト: 0）
+            now: 基準とする現在時刻（省略した場合は現在時刻を取得）
             
         Returns:
             datetime: 次の学習時間
         """
+        now = now or datetime.now(timezone.utc)
         if confidence == 0:
-            return datetime.now(timezone.utc) + timedelta(minutes=5)
+            return now + timedelta(minutes=5)
         
-        # 基本の学習間隔を計算
-        if next_mode == "MJ":
-            minutes = float(self.BASE_HOURS * 60 * 2**(8*float(proficiency_MJ)))
-        else:  # JM
-            minutes = float(self.BASE_HOURS * 60 * 2**(8*float(proficiency_JM)))
+        # 基本の学習間隔を取得（習熟度を最も近い段階に丸めて、計算済みの間隔を参照する）
+        proficiency = float(proficiency_MJ if next_mode == "MJ" else proficiency_JM)
+        step = min(PROFICIENCY_STEPS, max(0, round(proficiency * PROFICIENCY_STEPS)))
+        minutes = self.INTERVAL_MINUTES[step]
         
         # 復習可能単語数に基づくFactor補正を適用
         factor = self._calculate_factor(reviewable_count)
         minutes = minutes * factor
         
-        logger.info(f"Calculated next datetime: reviewable_count={reviewable_count}, factor={factor}, minutes={minutes}")
+        logger.info("Calculated next datetime: reviewable_count=%s, factor=%s, minutes=%s", reviewable_count, factor, minutes)
         
-        return datetime.now(timezone.utc) + timedelta(minutes=minutes)
+        return now + timedelta(minutes=minutes)
     
     def _calculate_factor(self, reviewable_count: int) -> float:
         """復習可能単語数に基づくFactorを計算します
@@ -55,26 +67,30 @@ class DateTimeService:
         else:  # reviewable_count > 500
             return 3.0
     
-    def calculate_interval_point(self, previous_datetime: Optional[datetime]) -> Decimal:
+    def calculate_interval_point(self, previous_datetime: Optional[datetime], now: Optional[datetime] = None) -> float:
         """前回の学習時間との間隔から interval_point を計算します
         
         Args:
             previous_datetime: 前回の学習時間
+            now: 基準とする現在時刻（省略した場合は現在時刻を取得）
             
         Returns:
-            Decimal: interval_point（0-1の範囲）
+            float: interval_point（0-1の範囲）
         """
         if previous_datetime is None:
-            return Decimal('0')
+            return 0.0
         
         # タイムゾーンの設定
         if previous_datetime.tzinfo is None:
             previous_datetime = previous_datetime.replace(tzinfo=timezone.utc)
         
-        current_datetime = datetime.now(timezone.utc)
+        current_datetime = now or datetime.now(timezone.utc)
         previous_interval = (current_datetime - previous_datetime).total_seconds()
+        # 時刻のずれ等で間隔が0以下の場合はlog2が計算できないため、間隔なしとして扱う
+        if previous_interval <= 0:
+            return 0.0
         
         # interval_point を計算（逆算式）
-        interval_point = Decimal(str(max(0, min(1, math.log2(previous_interval/(self.BASE_HOURS * 60)) / 8))))
+        interval_point = max(0.0, min(1.0, math.log2(previous_interval/(self.BASE_HOURS * 60)) / 8))
         
         return interval_point
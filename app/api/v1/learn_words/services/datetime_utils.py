@@ -1,6 +1,7 @@
 import logging
 from datetime import datetime, timezone
 from typing import Optional
+from common.utils.datetime_utils import parse_iso_datetime
 
 logger = logging.getLogger(__name__)
 
@@ -8,27 +9,26 @@ class DateTimeUtils:
     @staticmethod
     def parse_datetime_safe(dt_str: str) -> Optional[datetime]:
         """安全な日時解析を行います"""
-        try:
-            dt = datetime.fromisoformat(dt_str)
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone.utc)
-            return dt
-        except (ValueError, TypeError) as e:
-            logger.warning(f"Invalid datetime format: {dt_str}, error: {e}")
-            return None
+        return parse_iso_datetime(dt_str)
     
     @staticmethod
-    def is_reviewable(word: dict) -> bool:
-        """単語が復習可能かどうかをチェックします"""
-        if 'next_datetime' not in word:
-            return False
-        
-        next_dt = DateTimeUtils.parse_datetime_safe(word['next_datetime'])
+    def get_next_datetime(word: dict) -> Optional[datetime]:
+        """単語のnext_datetimeを解析して返します（next_datetimeがない・不正な場合はNone）
+        解析結果は'_next_dt'として単語に保存し、同じ単語を何度判定しても解析は1回で済むようにします
+        """
+        if '_next_dt' not in word:
+            next_datetime = word.get('next_datetime')
+            word['_next_dt'] = DateTimeUtils.parse_datetime_safe(next_datetime) if next_datetime is not None else None
+        return word['_next_dt']
+
+    @staticmethod
+    def is_reviewable(word: dict, now: Optional[datetime] = None) -> bool:
+        """単語が復習可能かどうかをチェックします（nowを省略した場合は現在時刻）"""
+        next_dt = DateTimeUtils.get_next_datetime(word)
         if next_dt is None:
             return False
         
-        now = datetime.now(timezone.utc)
-        return next_dt <= now
+        return next_dt <= (now or datetime.now(timezone.utc))
     
     @staticmethod
     def get_next_available_time(user_words: list) -> Optional[datetime]:
@@ -36,10 +36,8 @@ class DateTimeUtils:
         if not user_words:
             return None
         
-        try:
-            # next_datetimeが最も古い単語を取得
-            next_available_word = min(user_words, key=lambda x: x['next_datetime'])
-            return DateTimeUtils.parse_datetime_safe(next_available_word['next_datetime'])
-        except (KeyError, ValueError) as e:
-            logger.warning(f"Error getting next available time: {e}")
-            return None 
\ No newline at end of file
+        # 解析済みの日時で比較し、最も古いnext_datetimeを返す（文字列の比較ではフォーマットの違いで順序が崩れるため）
+        return min(
+            (next_dt for next_dt in map(DateTimeUtils.get_next_datetime, user_words) if next_dt is not None),
+            default=None
+        ) 
\ No newline at end of file
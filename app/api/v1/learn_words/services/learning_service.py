@@ -1,15 +1,21 @@
+import asyncio
 import logging
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Optional
 from decimal import Decimal
 from integrations.dynamodb.learn import LearnDynamoDB
+from integrations.dynamodb.next import NextDynamoDB
 from services.review_logic import ReviewLogic
 
 logger = logging.getLogger(__name__)
 
+# 未学習の単語の習熟度（Decimalは不変のため共有して使う）
+ZERO_PROFICIENCY = Decimal('0')
+
 class LearningService:
     def __init__(self):
         self.learn_db = LearnDynamoDB()
+        self.next_db = NextDynamoDB()
         self.proficiency_service = self.learn_db.proficiency_service
         self.mode_service = self.learn_db.mode_service
         self.datetime_service = self.learn_db.datetime_service
@@ -23,6 +29,9 @@ class LearningService:
                             time: Decimal) -> Dict:
         """学習履歴を記録します（ビジネスロジック）"""
         try:
+            # 現在時刻は1回だけ取得し、習熟度・次の学習時間・updated_atの計算で共有する
+            now = datetime.now(timezone.utc)
+            
             # ユーザーIDがない場合は記録をスキップ
             if not user_id:
                 logger.info("User ID is null or empty. Skipping DynamoDB record.")
@@ -30,28 +39,32 @@ class LearningService:
                     'user_id': user_id,
                     'word_id': word_id,
                     'level': level,
-                    'proficiency_MJ': Decimal('0'),
-                    'proficiency_JM': Decimal('0'),
+                    'proficiency_MJ': ZERO_PROFICIENCY,
+                    'proficiency_JM': ZERO_PROFICIENCY,
                     'next_mode': "MJ",  # デフォルトモード
-                    'next_datetime': datetime.now(timezone.utc) + timedelta(minutes=5)  # デフォルトの次回学習時間
+                    'next_datetime': now + timedelta(minutes=5)  # デフォルトの次回学習時間
                 }
 
-            # 現在のデータを取得
-            current_data = self.learn_db.get_current_learning_data(user_id, word_id)
+            # 現在のデータと復習可能単語数は互いに依存しないため並行して取得
+            current_data, reviewable_count = await asyncio.gather(
+                self.learn_db.get_current_learning_data(user_id, word_id),
+                self._get_reviewable_count(user_id, now)
+            )
                         
             # 現在のデータがある場合は更新、ない場合は新規作成
             if current_data:
-                proficiency_MJ = Decimal(str(current_data.get('proficiency_MJ', '0')))
-                proficiency_JM = Decimal(str(current_data.get('proficiency_JM', '0')))
+                # Tableリソースが数値をDecimalで返すため、文字列を経由して変換し直さない
+                proficiency_MJ = current_data.get('proficiency_MJ', ZERO_PROFICIENCY)
+                proficiency_JM = current_data.get('proficiency_JM', ZERO_PROFICIENCY)
             else:
-                proficiency_MJ = Decimal('0')
-                proficiency_JM = Decimal('0')
+                proficiency_MJ = ZERO_PROFICIENCY
+                proficiency_JM = ZERO_PROFICIENCY
             
             # 次の学習モードを決定
             next_mode = self.mode_service.determine_next_mode(proficiency_MJ, proficiency_JM)
 
             # 習熟度を計算
-            new_proficiency = self.proficiency_service.calculate_proficiency(confidence, time, current_data)            
+            new_proficiency = self.proficiency_service.calculate_proficiency(confidence, time, current_data, now)            
             
             # 新しい習熟度を更新
             if next_mode == "MJ":
@@ -59,16 +72,14 @@ class LearningService:
             else:
                 proficiency_JM = new_proficiency
             
-            # 復習可能単語数を取得
-            reviewable_count = await self._get_reviewable_count(user_id)
-            
             # 次の学習時間を計算（復習可能単語数による補正を適用）
             next_datetime = self.datetime_service.calculate_next_datetime(
                 confidence, 
                 next_mode, 
                 proficiency_MJ, 
                 proficiency_JM, 
-                reviewable_count
+                reviewable_count,
+                now
             )
 
             # 学習データを保存
@@ -79,7 +90,8 @@ class LearningService:
                 proficiency_MJ=proficiency_MJ,
                 proficiency_JM=proficiency_JM,
                 next_mode=next_mode,
-                next_datetime=next_datetime
+                next_datetime=next_datetime,
+                now=now
             )
             
             return result
@@ -88,26 +100,20 @@ class LearningService:
             logger.error(f"Error recording learning data: {str(e)}")
             raise
     
-    async def _get_reviewable_count(self, user_id: str) -> int:
+    async def _get_reviewable_count(self, user_id: str, now: Optional[datetime] = None) -> int:
         """ユーザーの復習可能単語数を取得します
         
         Args:
             user_id: ユーザーID
+            now: 判定の基準とする現在時刻（省略した場合は現在時刻を取得）
             
         Returns:
             int: 復習可能単語数
         """
         try:
-            # ユーザーの全学習履歴を取得
-            from integrations.dynamodb.next import NextDynamoDB
-            next_db = NextDynamoDB()
-            user_words = await next_db._get_user_words(user_id)
-            
-            # 復習可能な単語をフィルタリング
-            reviewable_words = self.review_logic.get_reviewable_words(user_words)
-            
-            reviewable_count = len(reviewable_words)
-            logger.info(f"User {user_id} has {reviewable_count} reviewable words")
+            # 復習可能な単語数をDynamoDB側で数える（学習履歴を全件取得しない）
+            reviewable_count = await self.next_db.count_reviewable_user_words(user_id, now or datetime.now(timezone.utc))
+            logger.info("User %s has %d reviewable words", user_id, reviewable_count)
             
             return reviewable_count
         except Exception as e:
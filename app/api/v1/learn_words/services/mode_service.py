@@ -4,7 +4,8 @@ from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
-PROFICIENCY_THRESHOLD = Decimal('0.4')  # 習熟度の差の閾値
+PROFICIENCY_THRESHOLD = 0.4  # 習熟度の差の閾値
+PROFICIENCY_DIFF_RANGE = PROFICIENCY_THRESHOLD * 2  # 確率を線形に変化させる差の幅（-0.4から0.4）
 
 class ModeService:
     def determine_next_mode(self, proficiency_MJ: Decimal, proficiency_JM: Decimal) -> str:
@@ -17,8 +18,8 @@ class ModeService:
         Returns:
             str: 次の学習モード（"MJ" または "JM"）
         """
-        # 習熟度の差を計算
-        proficiency_diff = proficiency_MJ - proficiency_JM
+        # 習熟度の差を計算（モードの判定のみに使うため、Decimalではなくfloatで計算する）
+        proficiency_diff = float(proficiency_MJ) - float(proficiency_JM)
         
         # 差が-0.4以下の場合、MJになる確率100%
         if proficiency_diff <= -PROFICIENCY_THRESHOLD:
@@ -30,7 +31,7 @@ class ModeService:
         
         # その他の場合、線形に確率を計算
         # -0.4から0.4の範囲を0から1の範囲にマッピング
-        jm_probability = (proficiency_diff + PROFICIENCY_THRESHOLD) / (PROFICIENCY_THRESHOLD * Decimal('2'))
+        jm_probability = (proficiency_diff + PROFICIENCY_THRESHOLD) / PROFICIENCY_DIFF_RANGE
         
         # 確率に基づいてモードを決定
-        return "JM" if random.random() < float(jm_probability) else "MJ"
+        return "JM" if random.random() < jm_probability else "MJ"
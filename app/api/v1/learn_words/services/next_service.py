@@ -1,14 +1,32 @@
+import asyncio
 import logging
 import random
 from datetime import datetime, timezone
-from typing import Dict, Optional, List, Union
+from typing import Dict, Iterable, Optional, List, Sequence, Set, Union
+from botocore.exceptions import ClientError
 from fastapi import HTTPException
+from common.config import MIN_LEVEL, MAX_LEVEL
 from integrations.dynamodb.next import NextDynamoDB
 from services.word_selector import WordSelector
 from services.review_logic import ReviewLogic
 
 logger = logging.getLogger(__name__)
 
+# 選択肢として出題する単語数
+OTHER_WORDS_COUNT = 3
+# 選択肢候補の予備数（出題単語との重複や詳細が取得できない単語の分を先読みしておく）
+SPARE_WORDS_COUNT = 6
+# 起動時に単語IDプールを先読みするレベル（全レベル）
+PREFETCH_LEVELS = tuple(range(MIN_LEVEL, MAX_LEVEL + 1))
+
+def _sample_word_ids(word_pool: Sequence[int], exclude_set: Set[int], count: int) -> List[int]:
+    """単語IDプールから除外ID以外をランダムに最大count個選択します
+    プール全体をフィルタリングせず、除外IDの数だけ多めにサンプリングしてから除外する
+    （除外IDが全て含まれていてもcount個、またはプール内の有効な単語全てが残る）
+    """
+    sampled_ids = random.sample(word_pool, min(count + len(exclude_set), len(word_pool)))
+    return [word_id for word_id in sampled_ids if word_id not in exclude_set][:count]
+
 class NextService:
     def __init__(self):
         self.next_db = NextDynamoDB()
@@ -18,14 +36,14 @@ class NextService:
     async def get_random_word(self, level: int) -> Optional[Dict]:
         """指定されたレベルからランダムに単語IDとモードを取得します"""
         try:
-            # ①単語リストの取得とレベルでのフィルタリング
-            level_words = await self.next_db._get_level_words(level)
-            if not level_words:
+            # ①レベル別の単語IDプールの取得（メモリ上にキャッシュ済み）
+            word_pool = await self.next_db.get_level_pool(level)
+            if not word_pool:
                 return None
 
             # ②ランダムに単語を選択
-            result = self.word_selector.select_random_word(level_words)
-            logger.info(f"Successfully retrieved random word for level {level}: {result}")
+            result = self.word_selector.select_random_word_from_pool(word_pool)
+            logger.debug("Successfully retrieved random word for level %s: %s", level, result)
             return result
         except Exception as e:
             logger.error(f"Error getting random word for level {level}: {str(e)}", exc_info=True)
@@ -41,20 +59,17 @@ class NextService:
             # 通常のレベル指定の場合
             level_int = int(level)
             
-            # ①単語リストの取得とレベルでのフィルタリング
-            level_words = await self.next_db._get_level_words(level_int)
-            if not level_words:
+            # ①レベル別の単語IDプール（整数に変換済みでメモリ上にキャッシュ）と、
+            # ③ユーザーの学習履歴（user-level-index GSIでDynamoDB側でレベルを絞り込む）を並行して取得
+            word_pool, user_level_words = await asyncio.gather(
+                self.next_db.get_level_pool(level_int),
+                self.next_db._get_user_words_by_level(user_id, level_int)
+            )
+            if not word_pool:
                 return None
             
-            # ③ユーザーの学習履歴の取得とレベルでのフィルタリング（user-level-index GSIを使用）
-            user_level_words = await self.next_db._get_user_words_by_level(user_id, level_int)
-            # word_selector.select_next_wordの引数としてuser_wordsが必要（後方互換性のため）
-            # 実際にはuser_level_wordsが提供されれば、select_next_word内でuser_wordsは使用されない
-            user_words = await self.next_db._get_user_words(user_id)
-            
             # ④単語選定方法の決定
-            # GSIで取得したuser_level_wordsを直接渡すことで、DynamoDB側でフィルタリング済みのデータを使用
-            return self.word_selector.select_next_word(level_words, user_words, user_id, level_int, user_level_words)
+            return self.word_selector.select_next_word(word_pool, user_level_words, user_id, level_int)
         except Exception as e:
             logger.error(f"Error getting next word for user {user_id}, level {level}: {str(e)}", exc_info=True)
             raise
@@ -62,10 +77,25 @@ class NextService:
     async def _get_next_word_review_all(self, user_id: str) -> Optional[Dict]:
         """全レベルから復習可能な単語を取得します（next_datetimeが最も古いものを選択）"""
         try:
+            # next_datetimeが最も古い学習履歴のみをGSIから取得（全件は読まない）
+            try:
+                earliest_word = await self.next_db._get_earliest_user_word(user_id)
+            except ClientError as e:
+                # インデックスが未作成の場合などは、従来どおり全件取得にフォールバック
+                logger.warning(f"Falling back to full learning history for user {user_id}: {str(e)}")
+            else:
+                if earliest_word is None:
+                    logger.info("No learning history found for user %s", user_id)
+                    return None
+                result = self.review_logic.get_review_all_word([earliest_word])
+                if result is not None:
+                    return result
+                # 先頭の履歴のnext_datetimeが解析できない場合は、全件から選択し直す
+
             # ユーザーの学習履歴を全て取得
             user_words = await self.next_db._get_user_words(user_id)
             if not user_words:
-                logger.info(f"No learning history found for user {user_id}")
+                logger.info("No learning history found for user %s", user_id)
                 return None
 
             return self.review_logic.get_review_all_word(user_words)
@@ -73,93 +103,168 @@ class NextService:
             logger.error(f"Error getting all-review word for user {user_id}: {str(e)}", exc_info=True)
             raise
 
-    async def get_other_words(self, level: Union[int, str], exclude_id: int, exclude_ids: Optional[List[int]] = None) -> List[int]:
-        """指定されたレベルで、除外ID以外の単語を3つ取得します
+    async def get_other_words(self, level: Union[int, str], exclude_id: Optional[int], exclude_ids: Optional[Iterable[int]] = None, count: int = OTHER_WORDS_COUNT) -> List[int]:
+        """指定されたレベルで、除外ID以外の単語を最大count個取得します
         
         Args:
             level: レベル
-            exclude_id: 除外する単語ID（主な除外ID）
-            exclude_ids: 追加で除外する単語IDのリスト（Noneの場合はexclude_idのみ除外）
+            exclude_id: 除外する単語ID（主な除外ID、Noneの場合は除外しない）
+            exclude_ids: 追加で除外する単語ID（Noneの場合はexclude_idのみ除外）
+            count: 取得する単語数（候補が3つ以上あれば、足りない分は少なく返します）
         
         Returns:
-            単語IDのリスト（最大3つ）
+            単語IDのリスト（最大count個。候補が3つ未満の場合は空リスト）
         """
         try:
             # ALL_REVIEWの場合の特別処理
             if level == "REVIEW_ALL":
-                return await self._get_other_words_review_all(exclude_id, exclude_ids)
+                return await self._get_other_words_review_all(exclude_id, exclude_ids, count)
             
             # 通常のレベル指定の場合
             level_int = int(level)
             
-            level_words = await self.next_db._get_level_words(level_int)
-            if not level_words:
-                logger.info(f"No words found in the database")
+            # レベル別の単語IDプール（メモリ上にキャッシュ済みのタプル）
+            word_pool = await self.next_db.get_level_pool(level_int)
+            if not word_pool:
+                logger.info("No words found in the database")
                 return []
             
-            # 除外IDのリストを作成
-            if exclude_ids is None:
-                exclude_ids = []
-            if exclude_id not in exclude_ids:
-                exclude_ids = [exclude_id] + exclude_ids
+            # 除外IDのセットを作成
+            exclude_set = set(exclude_ids) if exclude_ids else set()
+            if exclude_id is not None:
+                exclude_set.add(exclude_id)
             
-            # レベルでフィルタリングし、除外IDを除く
-            filtered_items = [
-                item for item in level_words 
-                if int(item['SK']) not in exclude_ids
-            ]
-            if len(filtered_items) < 3:
-                logger.info(f"Not enough words found for level {level_int} excluding words {exclude_ids}")
+            word_ids = _sample_word_ids(word_pool, exclude_set, count)
+            if len(word_ids) < OTHER_WORDS_COUNT:
+                logger.info("Not enough words found for level %s excluding words %s", level_int, exclude_set)
                 return []
-            
-            # ランダムに3つ選択
-            selected_items = random.sample(filtered_items, 3)
-            # word_idのリストを返す
-            word_ids = [int(item['SK']) for item in selected_items]
-            logger.info(f"Successfully retrieved 3 other words for level {level_int}, excluding words {exclude_ids}")
+            logger.debug("Successfully retrieved %d other words for level %s, excluding words %s", len(word_ids), level_int, exclude_set)
             return word_ids
         except Exception as e:
             logger.error(f"Error getting other words for level {level}, excluding word {exclude_id}: {str(e)}", exc_info=True)
             raise
 
-    async def _get_other_words_review_all(self, exclude_id: int, exclude_ids: Optional[List[int]] = None) -> List[int]:
-        """全レベルから除外ID以外の単語を3つ取得します"""
+    async def _get_other_words_review_all(self, exclude_id: Optional[int], exclude_ids: Optional[Iterable[int]] = None, count: int = OTHER_WORDS_COUNT) -> List[int]:
+        """全レベルから除外ID以外の単語を最大count個取得します"""
         try:
-            # 全単語を取得
-            items = await self.next_db._get_all_words()
-            if not items:
-                logger.info(f"No words found in the database")
+            # 全単語IDプール（メモリ上にキャッシュ済みのタプル）
+            word_pool = await self.next_db.get_all_words_pool()
+            if not word_pool:
+                logger.info("No words found in the database")
                 return []
             
-            # 除外IDのリストを作成
-            if exclude_ids is None:
-                exclude_ids = []
-            if exclude_id not in exclude_ids:
-                exclude_ids = [exclude_id] + exclude_ids
+            # 除外IDのセットを作成
+            exclude_set = set(exclude_ids) if exclude_ids else set()
+            if exclude_id is not None:
+                exclude_set.add(exclude_id)
             
-            # 除外IDを除く
-            filtered_items = [
-                item for item in items 
-                if int(item['SK']) not in exclude_ids
-            ]
-            if len(filtered_items) < 3:
-                logger.info(f"Not enough words found excluding words {exclude_ids}")
+            word_ids = _sample_word_ids(word_pool, exclude_set, count)
+            if len(word_ids) < OTHER_WORDS_COUNT:
+                logger.info("Not enough words found excluding words %s", exclude_set)
                 return []
-            
-            # ランダムに3つ選択
-            selected_items = random.sample(filtered_items, 3)
-            # word_idのリストを返す
-            word_ids = [int(item['SK']) for item in selected_items]
-            logger.info(f"Successfully retrieved 3 other words from all levels, excluding words {exclude_ids}")
+            logger.debug("Successfully retrieved %d other words from all levels, excluding words %s", len(word_ids), exclude_set)
             return word_ids
         except Exception as e:
             logger.error(f"Error getting other words from all levels, excluding word {exclude_id}: {str(e)}", exc_info=True)
             raise
 
+    async def build_quiz(self, user_id: Optional[str], level: Union[int, str], random_word: bool = False) -> Dict:
+        """出題単語の選択から選択肢・単語詳細の取得までをまとめて行い、出題データを返します
+        /next と /next/random の両方で使用し、出題単語と選択肢候補の取得を並行して行った上で、
+        単語詳細は予備を含めて1回のbatch_get_itemで取得します
+
+        Args:
+            user_id: ユーザーID（random_wordがTrueの場合は使用しません）
+            level: レベル（数値または"REVIEW_ALL"）
+            random_word: Trueの場合は学習履歴を使わずレベル内からランダムに出題します
+
+        Returns:
+            {"mode", "answer_word", "other_words"} の辞書。
+            出題可能な単語がない場合は {"no_word_available": True, "next_available_datetime": ...}
+
+        Raises:
+            HTTPException: 404 - 出題単語または選択肢が見つからない場合
+        """
+        # 1. 出題単語IDとモード取得と、選択肢候補の取得を並行して実行
+        # 選択肢候補は出題単語に依存しないため、出題単語との重複分と予備を含めて多めに取得する
+        if random_word:
+            next_word_task = self.get_random_word(int(level))
+        else:
+            next_word_task = self.get_next_word(user_id, level)
+        next_result, candidate_word_ids = await asyncio.gather(
+            next_word_task,
+            self.get_other_words(level, None, count=OTHER_WORDS_COUNT + 1 + SPARE_WORDS_COUNT)
+        )
+        if not next_result:
+            raise HTTPException(status_code=404, detail="No words found for the specified level")
+
+        # 単語がない場合はそのまま返す
+        if next_result.get('no_word_available'):
+            return next_result
+
+        answer_word_id = int(next_result['answer_word_id'])
+        mode = next_result['mode']
+
+        # 2. 選択肢候補から出題単語を除外
+        other_word_ids = [word_id for word_id in candidate_word_ids if word_id != answer_word_id]
+        if len(other_word_ids) < OTHER_WORDS_COUNT:
+            raise HTTPException(status_code=404, detail="Not enough words found for the specified level")
+
+        # 3. 単語詳細をまとめて取得（予備を含めて1回のbatch_get_itemで取得）
+        words_detail_dict = await self.batch_get_word_details((answer_word_id, *other_word_ids))
+
+        # 正解の単語が存在しない場合、エラーを返す
+        answer_word = words_detail_dict.get(answer_word_id)
+        if answer_word is None:
+            logger.error(f"Answer word {answer_word_id} not found in DynamoDB")
+            raise HTTPException(status_code=404, detail=f"Answer word {answer_word_id} not found")
+
+        # 元の順序を保持して、詳細が取得できた単語を先頭から選択
+        other_words = [word for word in map(words_detail_dict.get, other_word_ids) if word is not None][:OTHER_WORDS_COUNT]
+
+        # 他の単語が3つ未満の場合、取得済みの候補を全て除外して追加で取得
+        if len(other_words) < OTHER_WORDS_COUNT:
+            logger.info("Only %d valid words found, fetching additional words", len(other_words))
+            exclude_set = {answer_word_id, *other_word_ids}
+            additional_word_ids = await self.get_other_words(level, answer_word_id, exclude_set)
+
+            if additional_word_ids:
+                additional_details_dict = await self.batch_get_word_details(additional_word_ids)
+                other_words.extend(
+                    word for word in map(additional_details_dict.get, additional_word_ids) if word is not None
+                )
+                other_words = other_words[:OTHER_WORDS_COUNT]
+
+        # 他の単語が3つ未満の場合、エラーを返す
+        if len(other_words) < OTHER_WORDS_COUNT:
+            raise HTTPException(status_code=404, detail=f"Not enough valid words found. Only {len(other_words)} valid words available.")
+
+        return {
+            "mode": mode,
+            "answer_word": answer_word,
+            "other_words": other_words[:OTHER_WORDS_COUNT]  # 最大3つまで
+        }
+
+    async def prefetch_level_pools(self) -> None:
+        """全レベルの単語IDプールを先読みします（起動時のキャッシュウォームアップ用）"""
+        await self.next_db.prefetch_level_pools(PREFETCH_LEVELS)
+
+    def prefetch_level_pools_in_background(self) -> None:
+        """全レベルの単語IDプールの先読みをバックグラウンドで開始します"""
+        self.next_db.prefetch_level_pools_in_background(PREFETCH_LEVELS)
+
+    async def refresh_level_pools_periodically(self) -> None:
+        """全レベルの単語IDプールを定期的に取得し直します（キャンセルされるまで続ける）"""
+        await self.next_db.refresh_level_pools_periodically(PREFETCH_LEVELS)
+
+    async def invalidate_level_words(self, level: int) -> None:
+        """レベル別単語リストのキャッシュを削除します（単語の追加・削除後に使用）"""
+        await self.next_db.invalidate_level_words(level)
+
     async def get_word_detail(self, word_id: int) -> Optional[dict]:
         """単語詳細を取得します。単語が見つからない場合はNoneを返します"""
         return await self.next_db.get_word_detail(word_id)
 
-    async def batch_get_word_details(self, word_ids: List[int]) -> Dict[int, Optional[dict]]:
+    async def batch_get_word_details(self, word_ids: Sequence[int]) -> Dict[int, Optional[dict]]:
         """複数の単語詳細を一度に取得します（batch_get_itemを使用）"""
         return await self.next_db.batch_get_word_details(word_ids)
@@ -6,27 +6,41 @@ from .datetime_service import DateTimeService
 
 logger = logging.getLogger(__name__)
 
-TIME_LIMIT = Decimal('10')
+TIME_LIMIT = 10.0
+# 習熟度を保存する際の小数点以下の桁数
+PROFICIENCY_DIGITS = 6
+
+
+def _easiness_point(confidence: int) -> float:
+    """confidenceから easiness_point（0-1の範囲）を計算します"""
+    return max(0.0, min(1.0, 0.1 + (confidence / 3.0) * 0.8))
+
+
+# confidenceは0-3の整数のため、easiness_pointは起動時に計算しておく
+EASINESS_POINTS = {confidence: _easiness_point(confidence) for confidence in range(4)}
 
 class ProficiencyService:
     def __init__(self):
         self.datetime_service = DateTimeService()
     
-    def calculate_proficiency(self, confidence: int, time: Decimal, current_data: Optional[Dict] = None) -> Decimal:
-        """習熟度を計算します"""
-        easiness_point = Decimal('0.1') + (Decimal(str(confidence))/Decimal('3')) * Decimal('0.8')
+    def calculate_proficiency(self, confidence: int, time: Decimal, current_data: Optional[Dict] = None, now: Optional[datetime] = None) -> Decimal:
+        """習熟度を計算します
+        計算はfloatで行い、DynamoDBに保存するため最後に一度だけDecimalに変換します
+        nowを渡した場合は、前回の学習時間との間隔をその時刻を基準に計算します
+        """
+        easiness_point = EASINESS_POINTS.get(confidence)
+        if easiness_point is None:
+            easiness_point = _easiness_point(confidence)
         
         # 前回の学習時間との差を計算
         if current_data and 'updated_at' in current_data:
             previous_datetime = datetime.fromisoformat(current_data['updated_at'])
-            interval_point = self.datetime_service.calculate_interval_point(previous_datetime)
+            interval_point = self.datetime_service.calculate_interval_point(previous_datetime, now)
         else:
-            interval_point = Decimal('0')
-
-        time_point = (TIME_LIMIT - time)/TIME_LIMIT
+            interval_point = 0.0
 
-        # 各ポイントを0-1の範囲に制限
-        easiness_point = max(Decimal('0'), min(Decimal('1'), easiness_point))
-        time_point = max(Decimal('0'), min(Decimal('1'), time_point))
+        # 0-1の範囲に制限
+        time_point = max(0.0, min(1.0, (TIME_LIMIT - float(time)) / TIME_LIMIT))
 
-        return Decimal('0.4') * easiness_point + Decimal('0.4') * interval_point + Decimal('0.2') * time_point
+        proficiency = 0.4 * easiness_point + 0.4 * interval_point + 0.2 * time_point
+        return Decimal(str(round(proficiency, PROFICIENCY_DIGITS)))
@@ -1,4 +1,5 @@
 import logging
+from datetime import datetime, timezone
 from typing import Dict, List, Optional
 from .datetime_utils import DateTimeUtils
 
@@ -8,11 +9,8 @@ class ReviewLogic:
     @staticmethod
     def get_reviewable_words(user_words: List[Dict]) -> List[Dict]:
         """復習可能な単語を取得します"""
-        reviewable_words = []
-        for word in user_words:
-            if DateTimeUtils.is_reviewable(word):
-                reviewable_words.append(word)
-        return reviewable_words
+        now = datetime.now(timezone.utc)
+        return [word for word in user_words if DateTimeUtils.is_reviewable(word, now)]
     
     @staticmethod
     def get_review_all_word(user_words: List[Dict]) -> Optional[Dict]:
@@ -21,17 +19,24 @@ class ReviewLogic:
             logger.info("No learning history found")
             return None
         
-        # 復習可能な単語をフィルタリング
-        reviewable_words = ReviewLogic.get_reviewable_words(user_words)
+        # 復習可能な単語のうち、next_datetimeが最も古いものを1回の走査で選択
+        now = datetime.now(timezone.utc)
+        answer_word = None
+        answer_dt = None
+        for word in user_words:
+            next_dt = DateTimeUtils.get_next_datetime(word)
+            if next_dt is None or next_dt > now:
+                continue
+            if answer_dt is None or next_dt < answer_dt:
+                answer_word, answer_dt = word, next_dt
         
-        if reviewable_words:
-            # 復習可能な単語がある場合は、next_datetimeが最も古いものを選択
-            answer_word = min(reviewable_words, key=lambda x: x['next_datetime'])
+        if answer_word is not None:
+            # 復習可能な単語がある場合は、next_datetimeが最も古いものを出題
             result = {
                 'answer_word_id': answer_word['word_id'],
                 'mode': answer_word['next_mode']
             }
-            logger.info(f"Successfully retrieved all-review word: {result}")
+            logger.info("Successfully retrieved all-review word: %s", result)
             return result
         else:
             # 復習可能な単語がない場合は、次に利用可能になる時刻を計算
@@ -41,7 +46,7 @@ class ReviewLogic:
                     'no_word_available': True,
                     'next_available_datetime': next_available_dt
                 }
-                logger.info(f"No reviewable words available in all levels. Next available at: {next_available_dt}")
+                logger.info("No reviewable words available in all levels. Next available at: %s", next_available_dt)
                 return result
         
         return None 
\ No newline at end of file
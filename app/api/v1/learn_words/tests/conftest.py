@@ -0,0 +1,9 @@
+import os
+import sys
+
+# learn_wordsのモジュール（integrations, services等）とcommonをテストから読み込めるようにする
+LEARN_WORDS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, LEARN_WORDS_DIR)
+sys.path.insert(0, os.path.dirname(LEARN_WORDS_DIR))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-1")
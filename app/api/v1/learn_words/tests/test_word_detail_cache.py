@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+from integrations.dynamodb import next as next_module
+from integrations.dynamodb.next import NextDynamoDB
+
+THROTTLE_ERROR = ClientError(
+    {"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "throttled"}},
+    "BatchGetItem",
+)
+
+
+def _word_item(word_id: int) -> dict:
+    return {
+        "SK": {"S": str(word_id)},
+        "name": {"S": f"w{word_id}"},
+        "hiragana": {"S": f"h{word_id}"},
+        "level": {"N": "1"},
+    }
+
+
+class FakeBatchGet:
+    """batch_get_itemの代わりに、指定回数だけスロットリングしてから存在する単語を返す"""
+
+    def __init__(self, existing_ids, failures=1):
+        self.existing_ids = set(existing_ids)
+        self.failures = failures
+        self.calls = 0
+
+    async def __call__(self, keys):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise THROTTLE_ERROR
+        return [_word_item(int(key["SK"]["S"])) for key in keys if int(key["SK"]["S"]) in self.existing_ids]
+
+
+@pytest.fixture
+def next_db(monkeypatch):
+    # キャッシュはクラス属性のため、テスト毎に空にする
+    NextDynamoDB._word_detail_cache.clear()
+    NextDynamoDB._missing_word_ids.clear()
+    NextDynamoDB._inflight.clear()
+    monkeypatch.setattr(next_module.redis_cache, "REDIS_URL", None)
+    monkeypatch.setattr(next_module.redis_cache, "_redis", None)
+    return NextDynamoDB()
+
+
+def test_batch_get_word_details_recovers_after_throttle(next_db, monkeypatch):
+    fake = FakeBatchGet(existing_ids={1, 2})
+    monkeypatch.setattr(next_db, "_batch_get_items", fake)
+
+    with pytest.raises(ClientError):
+        asyncio.run(next_db.batch_get_word_details([1, 2]))
+    assert not NextDynamoDB._missing_word_ids
+
+    result = asyncio.run(next_db.batch_get_word_details([1, 2]))
+    assert result[1]["id"] == 1 and result[2]["id"] == 2
+
+
+def test_get_word_detail_recovers_after_throttle(next_db, monkeypatch):
+    fake = FakeBatchGet(existing_ids={1})
+    monkeypatch.setattr(next_db, "_batch_get_items", fake)
+
+    with pytest.raises(ClientError):
+        asyncio.run(next_db.get_word_detail(1))
+    assert 1 not in NextDynamoDB._missing_word_ids
+
+    assert asyncio.run(next_db.get_word_detail(1))["id"] == 1
+
+
+def test_absent_word_is_negative_cached(next_db, monkeypatch):
+    fake = FakeBatchGet(existing_ids={1}, failures=0)
+    monkeypatch.setattr(next_db, "_batch_get_items", fake)
+
+    result = asyncio.run(next_db.batch_get_word_details([1, 3]))
+    assert result[3] is None
+    assert 3 in NextDynamoDB._missing_word_ids
+    assert 1 not in NextDynamoDB._missing_word_ids
+
+
+def test_failed_refresh_keeps_stale_entry(next_db, monkeypatch):
+    fake = FakeBatchGet(existing_ids={1})
+    monkeypatch.setattr(next_db, "_batch_get_items", fake)
+    stale_word = {"id": 1, "name": "stale"}
+    NextDynamoDB._word_detail_cache[1] = (stale_word, time.monotonic())
+
+    with pytest.raises(ClientError):
+        asyncio.run(next_db._refresh_word_detail(1))
+    assert NextDynamoDB._word_detail_cache[1][0] is stale_word
+    assert 1 not in NextDynamoDB._missing_word_ids
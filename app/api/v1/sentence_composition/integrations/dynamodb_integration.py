@@ -1,20 +1,59 @@
+import asyncio
 import boto3
 import os
 import logging
 import random
+import threading
+import time
 from datetime import datetime, timezone
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
 from fastapi import HTTPException
+from common.aws import DYNAMODB_CONFIG
 from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
+TABLE_NAME = os.getenv('DYNAMODB_TABLE_NAME', 'japanese-learn-table')
+
+# サービスはリクエスト毎に生成されるため、リソースとTableはスレッド毎に1つだけ生成して共有する
+# （boto3のリソースはスレッドセーフではないため、スレッドプールで並行実行するクエリもスレッド間では共有しない）
+_local = threading.local()
+# boto3は同期APIのため、並行して実行するクエリはイベントループをブロックしないようスレッドプールで実行する
+_executor = ThreadPoolExecutor(max_workers=4)
+# レベル別の例文IDリストは例文の追加・削除時のみ変わるため、プロセス内でキャッシュする
+# （level -> (例文のリスト, 取得時刻)。レベル数は限られているため、期限切れの判定のみ行う）
+LEVEL_SENTENCES_TTL_SECONDS = int(os.getenv('LEVEL_SENTENCES_TTL_SECONDS', '600'))
+_level_sentences_cache: Dict[int, Tuple[List[Dict], float]] = {}
+
+def get_dynamodb():
+    """現在のスレッド用のDynamoDBリソースを返します（初回のみセッションとリソースを生成します）"""
+    dynamodb = getattr(_local, 'dynamodb', None)
+    if dynamodb is None:
+        dynamodb = boto3.session.Session().resource('dynamodb', config=DYNAMODB_CONFIG)
+        _local.dynamodb = dynamodb
+    return dynamodb
+
+def get_table():
+    """現在のスレッド用のTableを返します"""
+    table = getattr(_local, 'table', None)
+    if table is None:
+        table = get_dynamodb().Table(TABLE_NAME)
+        _local.table = table
+    return table
+
 class DynamoDBSentenceCompositionClient:
     def __init__(self):
-        self.table_name = os.getenv('DYNAMODB_TABLE_NAME', 'japanese-learn-table')
-        self.dynamodb = boto3.resource('dynamodb')
-        self.table = self.dynamodb.Table(self.table_name)
+        self.table_name = TABLE_NAME
+
+    @property
+    def dynamodb(self):
+        return get_dynamodb()
+
+    @property
+    def table(self):
+        return get_table()
 
     def get_random_sentence_by_level(self, level: int) -> Optional[Dict]:
         """
@@ -22,29 +61,7 @@ class DynamoDBSentenceCompositionClient:
         """
         try:
             # IDのみ取得してからランダム選択→詳細取得（embeddingを読み込まないため）
-            all_items = []
-            last_evaluated_key = None
-
-            while True:
-                query_params = {
-                    'IndexName': 'word-level-index',
-                    'KeyConditionExpression': "PK = :pk AND #level = :level",
-                    'ExpressionAttributeNames': {"#level": "level"},
-                    'ExpressionAttributeValues': {
-                        ":pk": "SENTENCE",
-                        ":level": int(level)
-                    },
-                    'ProjectionExpression': "PK, SK"
-                }
-                if last_evaluated_key:
-                    query_params['ExclusiveStartKey'] = last_evaluated_key
-
-                response = self.table.query(**query_params)
-                all_items.extend(response.get('Items', []))
-
-                last_evaluated_key = response.get('LastEvaluatedKey')
-                if not last_evaluated_key:
-                    break
+            all_items = self._load_level_sentences(level)
 
             if not all_items:
                 raise HTTPException(status_code=404, detail=f"No sentences found for level {level}")
@@ -192,14 +209,24 @@ class DynamoDBSentenceCompositionClient:
             raise
 
     async def get_user_sentences(self, user_id: str) -> List[Dict]:
-        """ユーザーの学習履歴を取得します"""
+        """ユーザーの学習履歴を取得します（スレッドプールで実行するため、他のクエリと並行して待てます）"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, self._get_user_sentences, user_id)
+
+    def _get_user_sentences(self, user_id: str) -> List[Dict]:
+        """get_user_sentencesの本体（同期処理）"""
         try:
             response = self.table.query(
                 KeyConditionExpression='PK = :pk AND begins_with(SK, :sk_prefix)',
+                ExpressionAttributeNames={
+                    '#level': 'level'
+                },
                 ExpressionAttributeValues={
                     ':pk': f"USER#{user_id}",
                     ':sk_prefix': 'SENTENCE#'
-                }
+                },
+                # 文の選択と復習可能数の計算に使う属性のみ取得
+                ProjectionExpression='sentence_id, #level, next_datetime'
             )
             return response.get('Items', [])
         except ClientError as e:
@@ -207,36 +234,57 @@ class DynamoDBSentenceCompositionClient:
             return []
 
     async def get_level_sentences(self, level: int) -> List[Dict]:
-        """指定されたレベルの文のIDリストを取得します（word-level-index GSI、ページネーション対応、embeddingを除外）"""
+        """指定されたレベルの文のIDリストを取得します（word-level-index GSI、ページネーション対応、embeddingを除外）
+        スレッドプールで実行するため、他のクエリと並行して待てます
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, self._get_level_sentences, level)
+
+    def _get_level_sentences(self, level: int) -> List[Dict]:
+        """get_level_sentencesの本体（同期処理）"""
         try:
-            all_sentences = []
-            last_evaluated_key = None
+            return self._load_level_sentences(level)
+        except ClientError as e:
+            logger.error(f"Error getting level sentences from DynamoDB: {str(e)}")
+            return []
 
-            while True:
-                query_params = {
-                    'IndexName': 'word-level-index',
-                    'KeyConditionExpression': "PK = :pk AND #level = :level",
-                    'ExpressionAttributeNames': {"#level": "level"},
-                    'ExpressionAttributeValues': {
-                        ":pk": "SENTENCE",
-                        ":level": int(level)
-                    },
-                    'ProjectionExpression': "PK, SK"
-                }
-                if last_evaluated_key:
-                    query_params['ExclusiveStartKey'] = last_evaluated_key
+    def _load_level_sentences(self, level: int) -> List[Dict]:
+        """指定されたレベルの例文IDリストを取得します（キャッシュが有効な場合はDynamoDBに問い合わせない）
+        返すリストはキャッシュと共有しているため、呼び出し側で変更しないこと
+        """
+        level = int(level)
+        cached = _level_sentences_cache.get(level)
+        if cached is not None and time.monotonic() - cached[1] < LEVEL_SENTENCES_TTL_SECONDS:
+            return cached[0]
 
-                response = self.table.query(**query_params)
-                all_sentences.extend(response.get('Items', []))
+        all_sentences = []
+        last_evaluated_key = None
 
-                last_evaluated_key = response.get('LastEvaluatedKey')
-                if not last_evaluated_key:
-                    break
+        while True:
+            query_params = {
+                'IndexName': 'word-level-index',
+                'KeyConditionExpression': "PK = :pk AND #level = :level",
+                'ExpressionAttributeNames': {"#level": "level"},
+                'ExpressionAttributeValues': {
+                    ":pk": "SENTENCE",
+                    ":level": level
+                },
+                'ProjectionExpression': "PK, SK"
+            }
+            if last_evaluated_key:
+                query_params['ExclusiveStartKey'] = last_evaluated_key
 
-            return all_sentences
-        except ClientError as e:
-            logger.error(f"Error getting level sentences from DynamoDB: {str(e)}")
-            return []
+            response = self.table.query(**query_params)
+            all_sentences.extend(response.get('Items', []))
+
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                break
+
+        # 例文がない場合はキャッシュせず、次回も問い合わせる
+        if all_sentences:
+            _level_sentences_cache[level] = (all_sentences, time.monotonic())
+        return all_sentences
 
     async def get_sentence_detail(self, sentence_id: int) -> Optional[Dict]:
         """文の詳細情報を取得します（embeddingを除外）"""
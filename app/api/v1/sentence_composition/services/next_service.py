@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import Dict, Optional
 from integrations.dynamodb_integration import DynamoDBSentenceCompositionClient
@@ -13,8 +14,15 @@ class NextService:
     async def get_next_sentence(self, user_id: Optional[str], level: int) -> Optional[Dict]:
         """次に学習すべき文を取得します"""
         try:
-            # ①指定レベルの文を全て取得
-            level_sentences = await self.db_client.get_level_sentences(level)
+            # ①指定レベルの文と、②ユーザーの学習履歴は互いに依存しないため並行して取得
+            # （user_idがない場合（未認証）は学習履歴を取得しない）
+            if user_id:
+                level_sentences, user_sentences = await asyncio.gather(
+                    self.db_client.get_level_sentences(level),
+                    self.db_client.get_user_sentences(user_id)
+                )
+            else:
+                level_sentences = await self.db_client.get_level_sentences(level)
             if not level_sentences:
                 logger.info(f"No sentences found for level {level}")
                 return None
@@ -28,9 +36,6 @@ class NextService:
                 sentence_detail = await self.db_client.get_sentence_detail(sentence_id)
                 return sentence_detail
             
-            # ②ユーザーの学習履歴を取得
-            user_sentences = await self.db_client.get_user_sentences(user_id)
-            
             # ③文選定
             result = self.sentence_selector.select_next_sentence(
                 level_sentences, 
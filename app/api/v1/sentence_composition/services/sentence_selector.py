@@ -1,30 +1,40 @@
 import logging
+from datetime import datetime, timezone
+from operator import itemgetter
 import random
 from typing import Dict, List, Optional
 from .datetime_utils import DateTimeUtils
 
 logger = logging.getLogger(__name__)
 
+# next_datetimeで比較するためのキー関数（lambdaではなくC実装のitemgetterを使う）
+_NEXT_DATETIME_KEY = itemgetter('next_datetime')
+
 class SentenceSelector:
     @staticmethod
     def select_new_sentence(level_sentences: List[Dict], user_sentences: List[Dict]) -> Optional[Dict]:
         """新しい文を選択します"""
-        # ユーザーが学習済みの文IDを取得
-        user_learned_ids = [int(s['sentence_id']) for s in user_sentences]
+        # ユーザーが学習済みの文IDを取得（setにして判定をO(1)にする）
+        user_learned_ids = {int(s['sentence_id']) for s in user_sentences}
         
-        # 新しい文（学習済みでない文）をフィルタリング
-        new_sentences = [
-            sentence for sentence in level_sentences 
-            if int(sentence['SK']) not in user_learned_ids
-        ]
+        # 新しい文（学習済みでない文）から1つをランダムに選択
+        # リストを作らずに1回の走査で選ぶ（リザーバサンプリング：k番目の候補を確率1/kで採用）
+        # （文IDは走査中に1回だけ変換し、選択した文のIDとしてそのまま使う）
+        selected_sentence_id = None
+        new_sentence_count = 0
+        for sentence in level_sentences:
+            sentence_id = int(sentence['SK'])
+            if sentence_id in user_learned_ids:
+                continue
+            new_sentence_count += 1
+            if random.randrange(new_sentence_count) == 0:
+                selected_sentence_id = sentence_id
         
-        if not new_sentences:
+        if selected_sentence_id is None:
             return None
         
-        # ランダムに選択
-        selected_item = random.choice(new_sentences)
         return {
-            'answer_sentence_id': int(selected_item['SK'])
+            'answer_sentence_id': selected_sentence_id
         }
     
     @staticmethod
@@ -33,17 +43,17 @@ class SentenceSelector:
         if not user_level_sentences:
             return None
         
-        # 復習可能な文をフィルタリング
-        reviewable_sentences = []
-        for sentence in user_level_sentences:
-            if DateTimeUtils.is_reviewable(sentence):
-                reviewable_sentences.append(sentence)
-        
-        if not reviewable_sentences:
+        # 復習可能な文のうち、next_datetimeが最も古いものを1回の走査で選択（中間リストを作らない）
+        # 現在時刻は1回だけ取得して全ての文の判定に使う
+        now = datetime.now(timezone.utc)
+        answer_sentence = min(
+            (sentence for sentence in user_level_sentences if DateTimeUtils.is_reviewable(sentence, now)),
+            key=_NEXT_DATETIME_KEY,
+            default=None
+        )
+        if answer_sentence is None:
             return None
         
-        # next_datetimeが最も古いものを選択
-        answer_sentence = min(reviewable_sentences, key=lambda x: x['next_datetime'])
         return {
             'answer_sentence_id': answer_sentence['sentence_id']
         }
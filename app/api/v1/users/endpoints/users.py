@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import ORJSONResponse
 from typing import Optional
 from integrations.dynamodb import (
     progress_db,
@@ -14,7 +15,7 @@ from common.config import VALID_GROUPS
 import logging
 from common.auth import get_current_user_id
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
 # テスト用のユーザーID（本番環境では削除してください）
@@ -55,11 +56,11 @@ async def get_words_progress(
         logger.error(f"Validation error in get_words_progress endpoint: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error in get_words_progress endpoint: {str(e)}")
+        logger.exception("Error in get_words_progress endpoint")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/words/plan")
-async def get_words_plan(current_user_id: str = Depends(get_current_user_id)):
+def get_words_plan(current_user_id: str = Depends(get_current_user_id)):
     """
     ログインユーザーの単語の今後のレビュー予定数を時間単位（24時間区切り）で集計して返す
     認証：必須（Bearerトークン）
@@ -79,13 +80,15 @@ async def get_words_plan(current_user_id: str = Depends(get_current_user_id)):
     """
     try:
         # ユーザー設定を取得してbase_levelを取得
-        user_settings = await user_settings_db.get_user_settings(current_user_id)
+        user_settings = user_settings_db.get_user_settings(current_user_id)
         base_level = user_settings.base_level if user_settings else None
         
-        result = await plan_db.get_plan(current_user_id, base_level=base_level)
+        result = plan_db.get_plan(current_user_id, base_level=base_level)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error in get_words_plan endpoint: {str(e)}")
+        logger.exception("Error in get_words_plan endpoint")
         raise HTTPException(status_code=500, detail=str(e))
 
 # テスト用エンドポイント（認証バイパス）
@@ -117,20 +120,20 @@ async def get_words_progress_test(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/test/words/plan")
-async def get_words_plan_test():
+def get_words_plan_test():
     """
     テスト用：認証なしでwords/planエンドポイントをテスト
     本番環境では削除してください
     """
     try:
-        result = await plan_db.get_plan(TEST_USER_ID)
+        result = plan_db.get_plan(TEST_USER_ID)
         return result
     except Exception as e:
         logger.error(f"Error in get_words_plan_test endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/sentences/progress")
-async def get_sentences_progress(
+def get_sentences_progress(
     current_user_id: str = Depends(get_current_user_id),
     group: str = Query(..., description="級を指定する文字列（N5, N4, N3, N2, N1）")
 ):
@@ -156,7 +159,7 @@ async def get_sentences_progress(
                 detail=f"Invalid group: {group}. Valid groups are: {VALID_GROUPS}"
             )
         
-        result = await sentences_progress_db.get_progress(current_user_id, group=group)
+        result = sentences_progress_db.get_progress(current_user_id, group=group)
         return result
     except HTTPException:
         raise
@@ -168,7 +171,7 @@ async def get_sentences_progress(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/sentences/plan")
-async def get_sentences_plan(current_user_id: str = Depends(get_current_user_id)):
+def get_sentences_plan(current_user_id: str = Depends(get_current_user_id)):
     """
     ログインユーザーの例文の今後のレビュー予定数を時間単位（24時間区切り）で集計して返す
     認証：必須（Bearerトークン）
@@ -188,10 +191,10 @@ async def get_sentences_plan(current_user_id: str = Depends(get_current_user_id)
     """
     try:
         # ユーザー設定を取得してbase_levelを取得
-        user_settings = await user_settings_db.get_user_settings(current_user_id)
+        user_settings = user_settings_db.get_user_settings(current_user_id)
         base_level = user_settings.base_level if user_settings else None
         
-        result = await sentences_plan_db.get_plan(current_user_id, base_level=base_level)
+        result = sentences_plan_db.get_plan(current_user_id, base_level=base_level)
         return result
     except Exception as e:
         logger.error(f"Error in get_sentences_plan endpoint: {str(e)}")
@@ -199,7 +202,7 @@ async def get_sentences_plan(current_user_id: str = Depends(get_current_user_id)
 
 # テスト用エンドポイント（認証バイパス）
 @router.get("/test/sentences/progress")
-async def get_sentences_progress_test(
+def get_sentences_progress_test(
     group: str = Query(..., description="級を指定する文字列（N5, N4, N3, N2, N1）")
 ):
     """
@@ -214,7 +217,7 @@ async def get_sentences_progress_test(
                 detail=f"Invalid group: {group}. Valid groups are: {VALID_GROUPS}"
             )
         
-        result = await sentences_progress_db.get_progress(TEST_USER_ID, group=group)
+        result = sentences_progress_db.get_progress(TEST_USER_ID, group=group)
         return result
     except HTTPException:
         raise
@@ -226,13 +229,13 @@ async def get_sentences_progress_test(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/test/sentences/plan")
-async def get_sentences_plan_test():
+def get_sentences_plan_test():
     """
     テスト用：認証なしでsentences/planエンドポイントをテスト
     本番環境では削除してください
     """
     try:
-        result = await sentences_plan_db.get_plan(TEST_USER_ID)
+        result = sentences_plan_db.get_plan(TEST_USER_ID)
         return result
     except Exception as e:
         logger.error(f"Error in get_sentences_plan_test endpoint: {str(e)}")
@@ -240,13 +243,13 @@ async def get_sentences_plan_test():
 
 
 @router.get("/kana/progress")
-async def get_kana_progress(current_user_id: str = Depends(get_current_user_id)):
+def get_kana_progress(current_user_id: str = Depends(get_current_user_id)):
     """
     ログインユーザーのかなのレベルごとの進捗情報を返す。
     レベルは -10 から 0 までを固定順で返却します。
     """
     try:
-        result = await kana_progress_db.get_progress(current_user_id)
+        result = kana_progress_db.get_progress(current_user_id)
         return result
     except Exception as e:
         logger.error(f"Error in get_kana_progress endpoint: {str(e)}")
@@ -254,13 +257,13 @@ async def get_kana_progress(current_user_id: str = Depends(get_current_user_id))
 
 
 @router.get("/test/kana/progress")
-async def get_kana_progress_test():
+def get_kana_progress_test():
     """
     テスト用：認証なしでkana/progressエンドポイントをテスト
     本番環境では削除してください
     """
     try:
-        result = await kana_progress_db.get_progress(TEST_USER_ID)
+        result = kana_progress_db.get_progress(TEST_USER_ID)
         return result
     except Exception as e:
         logger.error(f"Error in get_kana_progress_test endpoint: {str(e)}")
@@ -268,7 +271,7 @@ async def get_kana_progress_test():
 
 
 @router.get("/kana/plan")
-async def get_kana_plan(current_user_id: str = Depends(get_current_user_id)):
+def get_kana_plan(current_user_id: str = Depends(get_current_user_id)):
     """
     ログインユーザーのかなの今後のレビュー予定数を時間単位（24時間区切り）で集計して返す
     認証：必須（Bearerトークン）
@@ -277,11 +280,11 @@ async def get_kana_plan(current_user_id: str = Depends(get_current_user_id)):
     """
     try:
         # ユーザー設定を取得してbase_levelを確認
-        user_settings = await user_settings_db.get_user_settings(current_user_id)
+        user_settings = user_settings_db.get_user_settings(current_user_id)
         if user_settings and user_settings.base_level >= 1:
             return []
         
-        result = await kana_plan_db.get_plan(current_user_id)
+        result = kana_plan_db.get_plan(current_user_id)
         return result
     except Exception as e:
         logger.error(f"Error in get_kana_plan endpoint: {str(e)}")
@@ -289,13 +292,13 @@ async def get_kana_plan(current_user_id: str = Depends(get_current_user_id)):
 
 
 @router.get("/test/kana/plan")
-async def get_kana_plan_test():
+def get_kana_plan_test():
     """
     テスト用：認証なしでkana/planエンドポイントをテスト
     本番環境では削除してください
     """
     try:
-        result = await kana_plan_db.get_plan(TEST_USER_ID)
+        result = kana_plan_db.get_plan(TEST_USER_ID)
         return result
     except Exception as e:
         logger.error(f"Error in get_kana_plan_test endpoint: {str(e)}")
@@ -303,13 +306,13 @@ async def get_kana_plan_test():
 
 # ユーザー設定関連のエンドポイント
 @router.get("/settings")
-async def get_user_settings(current_user_id: str = Depends(get_current_user_id)):
+def get_user_settings(current_user_id: str = Depends(get_current_user_id)):
     """
     ログインユーザーの設定を取得する
     認証：必須（Bearerトークン）
     """
     try:
-        settings = await user_settings_db.get_user_settings(current_user_id)
+        settings = user_settings_db.get_user_settings(current_user_id)
         if not settings:
             raise HTTPException(status_code=404, detail="User settings not found")
         return settings
@@ -320,7 +323,7 @@ async def get_user_settings(current_user_id: str = Depends(get_current_user_id))
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/settings")
-async def create_user_settings(
+def create_user_settings(
     settings: UserSettingsCreate,
     current_user_id: str = Depends(get_current_user_id)
 ):
@@ -330,11 +333,11 @@ async def create_user_settings(
     """
     try:
         # 既存の設定があるかチェック
-        existing_settings = await user_settings_db.get_user_settings(current_user_id)
+        existing_settings = user_settings_db.get_user_settings(current_user_id)
         if existing_settings:
             raise HTTPException(status_code=409, detail="User settings already exist. Use PUT to update.")
         
-        result = await user_settings_db.create_user_settings(current_user_id, settings)
+        result = user_settings_db.create_user_settings(current_user_id, settings)
         return result
     except HTTPException:
         raise
@@ -343,7 +346,7 @@ async def create_user_settings(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/settings")
-async def update_user_settings(
+def update_user_settings(
     settings: UserSettingsUpdate,
     current_user_id: str = Depends(get_current_user_id)
 ):
@@ -352,7 +355,7 @@ async def update_user_settings(
     認証：必須（Bearerトークン）
     """
     try:
-        result = await user_settings_db.update_user_settings(current_user_id, settings)
+        result = user_settings_db.update_user_settings(current_user_id, settings)
         return result
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -361,13 +364,13 @@ async def update_user_settings(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/settings")
-async def delete_user_settings(current_user_id: str = Depends(get_current_user_id)):
+def delete_user_settings(current_user_id: str = Depends(get_current_user_id)):
     """
     ログインユーザーの設定を削除する
     認証：必須（Bearerトークン）
     """
     try:
-        await user_settings_db.delete_user_settings(current_user_id)
+        user_settings_db.delete_user_settings(current_user_id)
         return {"message": "User settings deleted successfully"}
     except Exception as e:
         logger.error(f"Error in delete_user_settings endpoint: {str(e)}")
@@ -375,13 +378,13 @@ async def delete_user_settings(current_user_id: str = Depends(get_current_user_i
 
 # テスト用エンドポイント（認証バイパス）
 @router.get("/test/settings")
-async def get_user_settings_test():
+def get_user_settings_test():
     """
     テスト用：認証なしでsettingsエンドポイントをテスト
     本番環境では削除してください
     """
     try:
-        settings = await user_settings_db.get_user_settings(TEST_USER_ID)
+        settings = user_settings_db.get_user_settings(TEST_USER_ID)
         if not settings:
             raise HTTPException(status_code=404, detail="User settings not found")
         return settings
@@ -392,27 +395,27 @@ async def get_user_settings_test():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/test/settings")
-async def create_user_settings_test(settings: UserSettingsCreate):
+def create_user_settings_test(settings: UserSettingsCreate):
     """
     テスト用：認証なしでsettings作成エンドポイントをテスト
     本番環境では削除してください
     """
     try:
-        result = await user_settings_db.create_user_settings(TEST_USER_ID, settings)
+        result = user_settings_db.create_user_settings(TEST_USER_ID, settings)
         return result
     except Exception as e:
         logger.error(f"Error in create_user_settings_test endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/activity")
-async def update_activity(current_user_id: str = Depends(get_current_user_id)):
+def update_activity(current_user_id: str = Depends(get_current_user_id)):
     """
     最終アクティブ日時を更新する
     認証：必須（Bearerトークン）
     ページ読み込み時およびトークンリフレッシュ時にフロントエンドから呼び出す
     """
     try:
-        await user_settings_db.update_last_login_at(current_user_id)
+        user_settings_db.update_last_login_at(current_user_id)
         return {"message": "Activity updated"}
     except Exception as e:
         logger.error(f"Error in update_activity endpoint: {str(e)}")
@@ -420,13 +423,13 @@ async def update_activity(current_user_id: str = Depends(get_current_user_id)):
 
 
 @router.put("/test/settings")
-async def update_user_settings_test(settings: UserSettingsUpdate):
+def update_user_settings_test(settings: UserSettingsUpdate):
     """
     テスト用：認証なしでsettings更新エンドポイントをテスト
     本番環境では削除してください
     """
     try:
-        result = await user_settings_db.update_user_settings(TEST_USER_ID, settings)
+        result = user_settings_db.update_user_settings(TEST_USER_ID, settings)
         return result
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
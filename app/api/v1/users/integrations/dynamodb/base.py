@@ -1,15 +1,52 @@
 import boto3
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, Optional, Sequence
 from botocore.exceptions import ClientError
+from common.aws import DYNAMODB_CONFIG
+from common.config import MIN_LEVEL, MAX_LEVEL
 
 logger = logging.getLogger(__name__)
 
+TABLE_NAME = os.getenv('DYNAMODB_TABLE_NAME', 'japanese-learn-table')
+
+# リソースとTableはスレッド毎に1つだけ生成し、そのスレッドの全てのDAOで共有する
+# （boto3のリソースはスレッドセーフではないため、スレッドプールから並行してクエリする場合もスレッド間では共有しない）
+_local = threading.local()
+
+# 同期APIのboto3を呼ぶ処理をイベントループから逃がすための、全DAO・サービス共通のスレッドプール
+# 全レベル分のクエリと履歴の集計が同時に走れるサイズにする
+executor = ThreadPoolExecutor(max_workers=MAX_LEVEL - MIN_LEVEL + 2)
+
+def get_dynamodb():
+    """現在のスレッド用のDynamoDBリソースを返します（初回のみセッションとリソースを生成します）"""
+    dynamodb = getattr(_local, 'dynamodb', None)
+    if dynamodb is None:
+        dynamodb = boto3.session.Session().resource('dynamodb', config=DYNAMODB_CONFIG)
+        _local.dynamodb = dynamodb
+    return dynamodb
+
+def get_table():
+    """現在のスレッド用のTableを返します"""
+    table = getattr(_local, 'table', None)
+    if table is None:
+        table = get_dynamodb().Table(TABLE_NAME)
+        _local.table = table
+    return table
+
 class DynamoDBBase:
     def __init__(self):
-        self.table_name = os.getenv('DYNAMODB_TABLE_NAME', 'japanese-learn-table')
-        self.dynamodb = boto3.resource('dynamodb')
-        self.table = self.dynamodb.Table(self.table_name)
+        self.table_name = TABLE_NAME
+
+    @property
+    def dynamodb(self):
+        return get_dynamodb()
+
+    @property
+    def table(self):
+        return get_table()
 
     def get_item(self, key: dict) -> dict:
         try:
@@ -18,3 +55,30 @@ class DynamoDBBase:
         except ClientError as e:
             logger.error(f"Error getting item: {str(e)}")
             return None
+
+    def iter_query_items(self, **query_params) -> Iterator[Dict]:
+        """queryの結果をページネーションしながら1件ずつ返します（全件をメモリに保持しません）"""
+        while True:
+            response = self.table.query(**query_params)
+            yield from response.get('Items', [])
+
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                break
+            query_params['ExclusiveStartKey'] = last_evaluated_key
+
+    def iter_user_word_items(self, user_id: str, attributes: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+        """ユーザーの単語学習履歴を1件ずつ返します
+        attributesを指定した場合はその属性のみを取得します（levelなどの予約語を含むため、属性名は全てプレースホルダーにする）
+        """
+        query_params = {
+            'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :sk_prefix)',
+            'ExpressionAttributeValues': {
+                ':pk': f"USER#{user_id}",
+                ':sk_prefix': 'WORD#'
+            }
+        }
+        if attributes:
+            query_params['ProjectionExpression'] = ', '.join(f"#{name}" for name in attributes)
+            query_params['ExpressionAttributeNames'] = {f"#{name}": name for name in attributes}
+        return self.iter_query_items(**query_params)
@@ -1,4 +1,5 @@
 import logging
+from operator import itemgetter
 from datetime import datetime, timezone
 from typing import Dict, List
 
@@ -7,23 +8,32 @@ from services.datetime_utils import DateTimeUtils
 
 logger = logging.getLogger(__name__)
 
+# time_slotで並べ替えるためのキー関数（lambdaではなくC実装のitemgetterを使う）
+_TIME_SLOT_KEY = itemgetter("time_slot")
+
 
 class KanaPlanDynamoDB(DynamoDBBase):
     def __init__(self) -> None:
         super().__init__()
         self.datetime_utils = DateTimeUtils()
 
-    async def get_plan(self, current_user_id: str) -> List[Dict]:
+    def get_plan(self, current_user_id: str) -> List[Dict]:
         """
         ログインユーザーのかな学習計画を返す（24時間スロット別の復習予定数）
         """
         try:
             user_response = self.table.query(
                 KeyConditionExpression="PK = :pk AND begins_with(SK, :sk_prefix)",
+                # char, characterは予約語のため別名で指定する
+                ExpressionAttributeNames={
+                    "#char": "char",
+                    "#character": "character",
+                },
                 ExpressionAttributeValues={
                     ":pk": f"USER#{current_user_id}",
                     ":sk_prefix": "KANA#",
                 },
+                ProjectionExpression="#char, #character, next_datetime",
             )
             user_items = user_response.get("Items", [])
             now = datetime.now(timezone.utc)
@@ -70,7 +80,7 @@ class KanaPlanDynamoDB(DynamoDBBase):
                     }
                 )
 
-            result.sort(key=lambda x: x["time_slot"])
+            result.sort(key=_TIME_SLOT_KEY)
 
             logger.info("Generated kana plan for user %s: %s", current_user_id, result)
             return result
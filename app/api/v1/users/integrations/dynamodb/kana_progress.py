@@ -1,4 +1,5 @@
 import logging
+from datetime import datetime, timezone
 from typing import Dict, List, Set
 
 from .base import DynamoDBBase
@@ -9,12 +10,14 @@ logger = logging.getLogger(__name__)
 
 class KanaProgressDynamoDB(DynamoDBBase):
     LEVELS = [-10, -7]  # ひらがな・カタカナ
+    # char, character, levelは予約語のため別名で指定する（進捗の集計に使う属性のみ取得）
+    KANA_ATTRIBUTE_NAMES = {"#char": "char", "#character": "character", "#level": "level"}
 
     def __init__(self) -> None:
         super().__init__()
         self.datetime_utils = DateTimeUtils()
 
-    async def get_progress(self, current_user_id: str) -> List[Dict]:
+    def get_progress(self, current_user_id: str) -> List[Dict]:
         """
         ログインユーザーのかなレベルごとの進捗情報を返す（学習済み／未学習／復習可能）
         レベルは -10（ひらがな）〜0（カタカナ）を想定
@@ -35,6 +38,7 @@ class KanaProgressDynamoDB(DynamoDBBase):
                     continue
                 user_items_by_level.setdefault(level_int, []).append(item)
 
+            now = datetime.now(timezone.utc)
             result: List[Dict] = []
             for level in self.LEVELS:
                 level_items = user_items_by_level.get(level, [])
@@ -65,7 +69,7 @@ class KanaProgressDynamoDB(DynamoDBBase):
                 reviewable = sum(
                     1
                     for item in level_items
-                    if self.datetime_utils.is_reviewable(item)
+                    if self.datetime_utils.is_reviewable(item, now)
                 )
 
                 result.append(
@@ -87,10 +91,12 @@ class KanaProgressDynamoDB(DynamoDBBase):
     def _get_user_kana_items(self, current_user_id: str) -> List[Dict]:
         response = self.table.query(
             KeyConditionExpression="PK = :pk AND begins_with(SK, :sk_prefix)",
+            ExpressionAttributeNames=self.KANA_ATTRIBUTE_NAMES,
             ExpressionAttributeValues={
                 ":pk": f"USER#{current_user_id}",
                 ":sk_prefix": "KANA#",
             },
+            ProjectionExpression="#char, #character, #level, proficiency, next_datetime",
         )
         return response.get("Items", [])
 
@@ -99,7 +105,9 @@ class KanaProgressDynamoDB(DynamoDBBase):
         try:
             response = self.table.query(
                 KeyConditionExpression="PK = :pk",
+                ExpressionAttributeNames=self.KANA_ATTRIBUTE_NAMES,
                 ExpressionAttributeValues={":pk": "KANA"},
+                ProjectionExpression="#char, #character, #level",
             )
             items = response.get("Items", [])
             for item in items:
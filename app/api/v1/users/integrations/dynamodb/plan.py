@@ -1,4 +1,5 @@
 import logging
+from collections import Counter
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Optional
 from .base import DynamoDBBase
@@ -6,39 +7,32 @@ from services.datetime_utils import DateTimeUtils
 
 logger = logging.getLogger(__name__)
 
+# 学習計画の集計に使う学習履歴の属性
+USER_WORD_ATTRIBUTES = ('word_id', 'level', 'next_datetime')
+
 class PlanDynamoDB(DynamoDBBase):
     def __init__(self):
         super().__init__()
         self.datetime_utils = DateTimeUtils()
 
-    async def get_plan(self, current_user_id: str, base_level: Optional[int] = None) -> List[Dict]:
+    def get_plan(self, current_user_id: str, base_level: Optional[int] = None) -> List[Dict]:
         """
         ログインユーザーの学習計画を返す（24時間スロット別の復習予定数）
         base_levelが指定されている場合、そのレベル以上のアイテムのみを処理する
         """
         try:
-            # ユーザーの学習履歴を全て取得
-            user_response = self.table.query(
-                KeyConditionExpression='PK = :pk AND begins_with(SK, :sk_prefix)',
-                ExpressionAttributeValues={
-                    ':pk': f"USER#{current_user_id}",
-                    ':sk_prefix': 'WORD#'
-                }
-            )
-            user_items = user_response.get('Items', [])
             now = datetime.now(timezone.utc)
             
-            # base_levelが指定されている場合、そのレベル以上のアイテムのみをフィルタリング
-            if base_level is not None:
-                user_items = [
-                    item for item in user_items
-                    if item.get('level') is not None and int(item.get('level', 0)) >= base_level
-                ]
-            
             # 24時間スロット別に復習予定を集計
-            time_slots = {}
+            time_slots = Counter()
             
-            for item in user_items:
+            # ユーザーの学習履歴をページ単位で読みながら集計する（全件をリストに保持しない）
+            for item in self.iter_user_word_items(current_user_id, USER_WORD_ATTRIBUTES):
+                # base_levelが指定されている場合、そのレベル以上のアイテムのみを対象とする
+                if base_level is not None and (item.get('level') is None or int(item['level']) < base_level):
+                    continue
+                
+                next_dt = None
                 if 'next_datetime' in item:
                     next_dt = self.datetime_utils.parse_datetime_safe(item['next_datetime'])
                 if next_dt is None:
@@ -54,27 +48,15 @@ class PlanDynamoDB(DynamoDBBase):
                 else:
                     time_slot = int(time_diff_minutes // (24 * 60)) + 1
                 
-                time_slots[time_slot] = time_slots.get(time_slot, 0) + 1
-            
-            # 結果をリスト形式で返す（time_slot: 0は必ず含める）
-            result = []
-            max_slot = max(time_slots.keys()) if time_slots else 0
-            
-            for slot in range(max_slot + 1):
-                result.append({
-                    "time_slot": slot,
-                    "count": time_slots.get(slot, 0)
-                })
-            
-            # time_slot: 0が存在しない場合は追加
-            if not any(item["time_slot"] == 0 for item in result):
-                result.append({
-                    "time_slot": 0,
-                    "count": 0
-                })
+                time_slots[time_slot] += 1
             
-            # time_slotでソート
-            result.sort(key=lambda x: x["time_slot"])
+            # 結果をtime_slot順のリスト形式で返す（time_slot: 0は必ず含める）
+            # Counterは存在しないキーに0を返すため、空きスロットもそのまま埋まる
+            max_slot = max(time_slots) if time_slots else 0
+            result = [
+                {"time_slot": slot, "count": time_slots[slot]}
+                for slot in range(max_slot + 1)
+            ]
             
             logger.info(f"Generated plan for user {current_user_id}: {result}")
             return result
@@ -1,12 +1,17 @@
+import asyncio
 import logging
+from collections import defaultdict
 from datetime import datetime, timezone
 from typing import List, Dict, Optional
-from .base import DynamoDBBase
+from .base import DynamoDBBase, executor
 from services.datetime_utils import DateTimeUtils
 from common.config import MIN_LEVEL, MAX_LEVEL, GROUP_TO_LEVELS
 
 logger = logging.getLogger(__name__)
 
+# 進捗の集計に使う学習履歴の属性
+USER_WORD_ATTRIBUTES = ('word_id', 'level', 'next_datetime', 'proficiency_MJ', 'proficiency_JM')
+
 class ProgressDynamoDB(DynamoDBBase):
     def __init__(self):
         super().__init__()
@@ -68,17 +73,25 @@ class ProgressDynamoDB(DynamoDBBase):
             if last_evaluated_key:
                 response = self.table.query(
                     KeyConditionExpression='PK = :pk',
+                    ExpressionAttributeNames={
+                        '#level': 'level'
+                    },
                     ExpressionAttributeValues={
                         ':pk': 'WORD'
                     },
+                    ProjectionExpression='PK, SK, #level',
                     ExclusiveStartKey=last_evaluated_key
                 )
             else:
                 response = self.table.query(
                     KeyConditionExpression='PK = :pk',
+                    ExpressionAttributeNames={
+                        '#level': 'level'
+                    },
                     ExpressionAttributeValues={
                         ':pk': 'WORD'
-                    }
+                    },
+                    ProjectionExpression='PK, SK, #level'
                 )
             
             all_words.extend(response.get('Items', []))
@@ -89,6 +102,23 @@ class ProgressDynamoDB(DynamoDBBase):
         
         return all_words
 
+    def _aggregate_user_stats(self, user_id: str, target_level_set: set) -> Dict[int, Dict]:
+        """ユーザーの学習履歴をページ単位で読みながらレベルごとに集計します
+        （全件をリストに保持せず、レベル毎の学習済み単語ID・復習可能数・習熟度の合計だけを持つ）
+        """
+        user_stats_by_level = defaultdict(lambda: {"learned_ids": set(), "reviewable": 0, "gross_proficiency": 0.0})
+        now = datetime.now(timezone.utc)
+        for item in self.iter_user_word_items(user_id, USER_WORD_ATTRIBUTES):
+            level = item.get('level')
+            if level not in target_level_set:
+                continue
+            stats = user_stats_by_level[level]
+            stats["learned_ids"].add(int(item['word_id']))
+            if self.datetime_utils.is_reviewable(item, now):
+                stats["reviewable"] += 1
+            stats["gross_proficiency"] += float(item.get('proficiency_MJ', 0)) + float(item.get('proficiency_JM', 0))
+        return user_stats_by_level
+
     async def get_progress(self, current_user_id: str, group: Optional[str] = None) -> List[Dict]:
         """
         ログインユーザーのレベルごとの進捗情報を返す（unlearnedも含む）
@@ -107,22 +137,18 @@ class ProgressDynamoDB(DynamoDBBase):
             else:
                 target_levels = list(range(MIN_LEVEL, MAX_LEVEL + 1))
             
-            # ユーザーの学習履歴を全て取得
-            user_response = self.table.query(
-                KeyConditionExpression='PK = :pk AND begins_with(SK, :sk_prefix)',
-                ExpressionAttributeValues={
-                    ':pk': f"USER#{current_user_id}",
-                    ':sk_prefix': 'WORD#'
-                }
+            # ユーザーの学習履歴の集計と、必要なレベルの単語の取得（word-level-index GSIを使用）を並行して実行する
+            # （レベル毎のクエリは互いに独立しているため、1レベルずつ順番に待たない）
+            loop = asyncio.get_running_loop()
+            user_stats_by_level, *level_words_list = await asyncio.gather(
+                loop.run_in_executor(executor, self._aggregate_user_stats, current_user_id, set(target_levels)),
+                *(loop.run_in_executor(executor, self._get_level_words, level) for level in target_levels)
             )
-            user_items = user_response.get('Items', [])
-            
-            # 必要なレベルの単語のみを取得（word-level-index GSIを使用）
-            words_by_level = {}
-            for level in target_levels:
-                level_words = self._get_level_words(level)
-                if level_words:
-                    words_by_level[level] = level_words
+            words_by_level = {
+                level: level_words
+                for level, level_words in zip(target_levels, level_words_list)
+                if level_words
+            }
             
             # インデックス取得が失敗した場合のフォールバック
             if not words_by_level and target_levels:
@@ -135,26 +161,21 @@ class ProgressDynamoDB(DynamoDBBase):
                             words_by_level[word_level] = []
                         words_by_level[word_level].append(word)
             
-            now = datetime.now(timezone.utc)
             result = []
             for level in target_levels:
                 # レベルごとの全単語IDを取得
                 level_words = words_by_level.get(level, [])
-                all_word_ids = set(int(item['SK']) for item in level_words)
+                all_word_ids = {int(item['SK']) for item in level_words}
                 
                 # ユーザーの学習済み単語IDリスト
-                level_user_items = [item for item in user_items if item.get('level') == level]
-                user_learned_ids = set(int(item['word_id']) for item in level_user_items)
+                stats = user_stats_by_level.get(level)
+                user_learned_ids = stats["learned_ids"] if stats else set()
                 learned = len(user_learned_ids)
                 unlearned = len(all_word_ids - user_learned_ids)
-                reviewable = sum(
-                    1 for item in level_user_items
-                    if self.datetime_utils.is_reviewable(item)
-                )
-                if level_user_items:
+                reviewable = stats["reviewable"] if stats else 0
+                if stats:
                     # 学習済み単語の習熟度の平均を計算
-                    gross_proficiency = sum(float(item.get('proficiency_MJ', 0)) + float(item.get('proficiency_JM', 0)) for item in level_user_items)
-                    avg_proficiency_of_learned = gross_proficiency / (2 * learned) if learned > 0 else 0
+                    avg_proficiency_of_learned = stats["gross_proficiency"] / (2 * learned) if learned > 0 else 0
                     
                     # 全体の進捗率を計算（学習済み単語数 / 全単語数）
                     total_words = learned + unlearned
@@ -180,6 +201,7 @@ class ProgressDynamoDB(DynamoDBBase):
     async def get_progress_by_level(self, current_user_id: str, level: int) -> Optional[Dict]:
         """
         指定されたレベルの進捗情報を返す（単一レベル）
+        boto3は同期APIのため、イベントループをブロックしないようスレッドプールで実行します
         
         Args:
             current_user_id: ユーザーID
@@ -189,16 +211,17 @@ class ProgressDynamoDB(DynamoDBBase):
             Dict: レベルごとの進捗情報（level, progress, reviewable, learned, unlearned）
                   または None（データがない場合）
         """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self._get_progress_by_level, current_user_id, level)
+
+    def _get_progress_by_level(self, current_user_id: str, level: int) -> Optional[Dict]:
+        """get_progress_by_levelの本体（同期処理）"""
         try:
-            # ユーザーの学習履歴を取得（レベルでフィルタリング）
-            user_response = self.table.query(
-                KeyConditionExpression='PK = :pk AND begins_with(SK, :sk_prefix)',
-                ExpressionAttributeValues={
-                    ':pk': f"USER#{current_user_id}",
-                    ':sk_prefix': 'WORD#'
-                }
-            )
-            user_items = user_response.get('Items', [])
+            # ユーザーの学習履歴を全ページ分取得し、指定レベルのものだけを保持する
+            level_user_items = [
+                item for item in self.iter_user_word_items(current_user_id, USER_WORD_ATTRIBUTES)
+                if item.get('level') == level
+            ]
             
             # 指定レベルの単語を取得
             level_words = self._get_level_words(level)
@@ -214,13 +237,13 @@ class ProgressDynamoDB(DynamoDBBase):
             all_word_ids = set(int(item['SK']) for item in level_words)
             
             # ユーザーの学習済み単語IDリスト
-            level_user_items = [item for item in user_items if item.get('level') == level]
             user_learned_ids = set(int(item['word_id']) for item in level_user_items)
             learned = len(user_learned_ids)
             unlearned = len(all_word_ids - user_learned_ids)
+            now = datetime.now(timezone.utc)
             reviewable = sum(
                 1 for item in level_user_items
-                if self.datetime_utils.is_reviewable(item)
+                if self.datetime_utils.is_reviewable(item, now)
             )
             
             if level_user_items:
@@ -1,4 +1,5 @@
 import logging
+from operator import itemgetter
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Optional
 from .base import DynamoDBBase
@@ -6,12 +7,15 @@ from services.datetime_utils import DateTimeUtils
 
 logger = logging.getLogger(__name__)
 
+# time_slotで並べ替えるためのキー関数（lambdaではなくC実装のitemgetterを使う）
+_TIME_SLOT_KEY = itemgetter("time_slot")
+
 class SentencesPlanDynamoDB(DynamoDBBase):
     def __init__(self):
         super().__init__()
         self.datetime_utils = DateTimeUtils()
 
-    async def get_plan(self, current_user_id: str, base_level: Optional[int] = None) -> List[Dict]:
+    def get_plan(self, current_user_id: str, base_level: Optional[int] = None) -> List[Dict]:
         """
         ログインユーザーの例文の学習計画を返す（24時間スロット別の復習予定数）
         base_levelが指定されている場合、そのレベル以上のアイテムのみを処理する
@@ -20,10 +24,15 @@ class SentencesPlanDynamoDB(DynamoDBBase):
             # ユーザーの例文学習履歴を全て取得
             user_response = self.table.query(
                 KeyConditionExpression='PK = :pk AND begins_with(SK, :sk_prefix)',
+                ExpressionAttributeNames={
+                    '#level': 'level'
+                },
                 ExpressionAttributeValues={
                     ':pk': f"USER#{current_user_id}",
                     ':sk_prefix': 'SENTENCE#'
-                }
+                },
+                # 学習計画の集計に使う属性のみ取得
+                ProjectionExpression='sentence_id, #level, next_datetime'
             )
             user_items = user_response.get('Items', [])
             now = datetime.now(timezone.utc)
@@ -74,7 +83,7 @@ class SentencesPlanDynamoDB(DynamoDBBase):
                 })
             
             # time_slotでソート
-            result.sort(key=lambda x: x["time_slot"])
+            result.sort(key=_TIME_SLOT_KEY)
             
             logger.info(f"Generated sentences plan for user {current_user_id}: {result}")
             return result
@@ -1,7 +1,9 @@
+import asyncio
 import logging
+from collections import defaultdict
 from datetime import datetime, timezone
 from typing import List, Dict, Optional
-from .base import DynamoDBBase
+from .base import DynamoDBBase, executor
 from services.datetime_utils import DateTimeUtils
 from common.config import MIN_LEVEL, MAX_LEVEL, GROUP_TO_LEVELS
 
@@ -24,7 +26,9 @@ class SentencesProgressDynamoDB(DynamoDBBase):
                 ExpressionAttributeValues={
                     ":pk": "SENTENCE",
                     ":level": int(level)
-                }
+                },
+                # 進捗の集計に使う属性のみ取得
+                ProjectionExpression="SK, #level"
             )
             level_sentences = response.get('Items', [])
             if not level_sentences:
@@ -48,17 +52,25 @@ class SentencesProgressDynamoDB(DynamoDBBase):
             if last_evaluated_key:
                 response = self.table.query(
                     KeyConditionExpression='PK = :pk',
+                    ExpressionAttributeNames={
+                        '#level': 'level'
+                    },
                     ExpressionAttributeValues={
                         ':pk': 'SENTENCE'
                     },
+                    ProjectionExpression='SK, #level',
                     ExclusiveStartKey=last_evaluated_key
                 )
             else:
                 response = self.table.query(
                     KeyConditionExpression='PK = :pk',
+                    ExpressionAttributeNames={
+                        '#level': 'level'
+                    },
                     ExpressionAttributeValues={
                         ':pk': 'SENTENCE'
-                    }
+                    },
+                    ProjectionExpression='SK, #level'
                 )
             
             all_sentences.extend(response.get('Items', []))
@@ -69,7 +81,7 @@ class SentencesProgressDynamoDB(DynamoDBBase):
         
         return all_sentences
 
-    async def get_progress(self, current_user_id: str, group: Optional[str] = None) -> List[Dict]:
+    def get_progress(self, current_user_id: str, group: Optional[str] = None) -> List[Dict]:
         """
         ログインユーザーの例文のレベルごとの進捗情報を返す（unlearnedも含む）
         
@@ -90,10 +102,14 @@ class SentencesProgressDynamoDB(DynamoDBBase):
             # ユーザーの例文学習履歴を全て取得
             user_response = self.table.query(
                 KeyConditionExpression='PK = :pk AND begins_with(SK, :sk_prefix)',
+                ExpressionAttributeNames={
+                    '#level': 'level'
+                },
                 ExpressionAttributeValues={
                     ':pk': f"USER#{current_user_id}",
                     ':sk_prefix': 'SENTENCE#'
-                }
+                },
+                ProjectionExpression='sentence_id, #level, next_datetime, proficiency'
             )
             user_items = user_response.get('Items', [])
             
@@ -115,6 +131,11 @@ class SentencesProgressDynamoDB(DynamoDBBase):
                             sentences_by_level[sentence_level] = []
                         sentences_by_level[sentence_level].append(sentence)
             
+            # ユーザーの学習履歴を1回の走査でレベルごとに振り分ける（レベル毎に全件を走査しない）
+            user_items_by_level = defaultdict(list)
+            for item in user_items:
+                user_items_by_level[item.get('level')].append(item)
+            
             now = datetime.now(timezone.utc)
             result = []
             for level in target_levels:
@@ -123,13 +144,13 @@ class SentencesProgressDynamoDB(DynamoDBBase):
                 all_sentence_ids = set(int(item['SK']) for item in level_sentences)
                 
                 # ユーザーの学習済み例文IDリスト
-                level_user_items = [item for item in user_items if item.get('level') == level]
+                level_user_items = user_items_by_level.get(level, [])
                 user_learned_ids = set(int(item['sentence_id']) for item in level_user_items)
                 learned = len(user_learned_ids)
                 unlearned = len(all_sentence_ids - user_learned_ids)
                 reviewable = sum(
                     1 for item in level_user_items
-                    if self.datetime_utils.is_reviewable(item)
+                    if self.datetime_utils.is_reviewable(item, now)
                 )
                 if level_user_items:
                     # 学習済み例文の習熟度の平均を計算
@@ -159,6 +180,7 @@ class SentencesProgressDynamoDB(DynamoDBBase):
     async def get_progress_by_level(self, current_user_id: str, level: int) -> Optional[Dict]:
         """
         指定されたレベルの例文進捗情報を返す（単一レベル）
+        boto3は同期APIのため、イベントループをブロックしないようスレッドプールで実行します
         
         Args:
             current_user_id: ユーザーID
@@ -168,14 +190,23 @@ class SentencesProgressDynamoDB(DynamoDBBase):
             Dict: レベルごとの進捗情報（level, progress, reviewable, learned, unlearned）
                   または None（データがない場合）
         """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self._get_progress_by_level, current_user_id, level)
+
+    def _get_progress_by_level(self, current_user_id: str, level: int) -> Optional[Dict]:
+        """get_progress_by_levelの本体（同期処理）"""
         try:
             # ユーザーの例文学習履歴を取得
             user_response = self.table.query(
                 KeyConditionExpression='PK = :pk AND begins_with(SK, :sk_prefix)',
+                ExpressionAttributeNames={
+                    '#level': 'level'
+                },
                 ExpressionAttributeValues={
                     ':pk': f"USER#{current_user_id}",
                     ':sk_prefix': 'SENTENCE#'
-                }
+                },
+                ProjectionExpression='sentence_id, #level, next_datetime, proficiency'
             )
             user_items = user_response.get('Items', [])
             
@@ -11,7 +11,7 @@ class UserSettingsDynamoDB(DynamoDBBase):
     def __init__(self):
         super().__init__()
 
-    async def get_user_settings(self, user_id: str) -> Optional[UserSettingsResponse]:
+    def get_user_settings(self, user_id: str) -> Optional[UserSettingsResponse]:
         """
         ユーザーの設定を取得する
         """
@@ -41,7 +41,7 @@ class UserSettingsDynamoDB(DynamoDBBase):
             logger.error(f"Error getting user settings for user {user_id}: {str(e)}")
             raise
 
-    async def create_user_settings(self, user_id: str, settings: UserSettingsCreate) -> UserSettingsResponse:
+    def create_user_settings(self, user_id: str, settings: UserSettingsCreate) -> UserSettingsResponse:
         """
         ユーザーの設定を作成する
         """
@@ -74,13 +74,13 @@ class UserSettingsDynamoDB(DynamoDBBase):
             logger.error(f"Error creating user settings for user {user_id}: {str(e)}")
             raise
 
-    async def update_user_settings(self, user_id: str, settings: UserSettingsUpdate) -> UserSettingsResponse:
+    def update_user_settings(self, user_id: str, settings: UserSettingsUpdate) -> UserSettingsResponse:
         """
         ユーザーの設定を更新する
         """
         try:
             # 既存の設定を取得
-            existing_settings = await self.get_user_settings(user_id)
+            existing_settings = self.get_user_settings(user_id)
             if not existing_settings:
                 raise ValueError(f"User settings not found for user {user_id}")
             
@@ -130,13 +130,13 @@ class UserSettingsDynamoDB(DynamoDBBase):
             )
             
             # 更新後の設定を取得して返す
-            return await self.get_user_settings(user_id)
+            return self.get_user_settings(user_id)
             
         except Exception as e:
             logger.error(f"Error updating user settings for user {user_id}: {str(e)}")
             raise
 
-    async def delete_user_settings(self, user_id: str) -> bool:
+    def delete_user_settings(self, user_id: str) -> bool:
         """
         ユーザーの設定を削除する
         """
@@ -152,7 +152,7 @@ class UserSettingsDynamoDB(DynamoDBBase):
             logger.error(f"Error deleting user settings for user {user_id}: {str(e)}")
             raise
 
-    async def update_last_login_at(self, user_id: str) -> None:
+    def update_last_login_at(self, user_id: str) -> None:
         """
         最終アクティブ日時を更新する。
         SETTINGSアイテムが存在しない場合（オンボーディング未完了）はスキップする。
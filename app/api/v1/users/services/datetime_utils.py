@@ -1,25 +1,25 @@
 import logging
+from operator import itemgetter
 from datetime import datetime, timezone
 from typing import Optional
+from common.utils.datetime_utils import parse_iso_datetime
 
 logger = logging.getLogger(__name__)
 
+# next_datetimeで比較するためのキー関数（lambdaではなくC実装のitemgetterを使う）
+_NEXT_DATETIME_KEY = itemgetter('next_datetime')
+
 class DateTimeUtils:
     @staticmethod
     def parse_datetime_safe(dt_str: str) -> Optional[datetime]:
         """安全な日時解析を行います"""
-        try:
-            dt = datetime.fromisoformat(dt_str)
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone.utc)
-            return dt
-        except (ValueError, TypeError) as e:
-            logger.warning(f"Invalid datetime format: {dt_str}, error: {e}")
-            return None
+        return parse_iso_datetime(dt_str)
     
     @staticmethod
-    def is_reviewable(word: dict) -> bool:
-        """単語が復習可能かどうかをチェックします"""
+    def is_reviewable(word: dict, now: Optional[datetime] = None) -> bool:
+        """単語が復習可能かどうかをチェックします（nowを省略した場合は現在時刻）
+        多数の単語を判定する場合は、nowを一度だけ取得して渡してください
+        """
         if 'next_datetime' not in word:
             return False
         
@@ -27,8 +27,7 @@ class DateTimeUtils:
         if next_dt is None:
             return False
         
-        now = datetime.now(timezone.utc)
-        return next_dt <= now
+        return next_dt <= (now or datetime.now(timezone.utc))
     
     @staticmethod
     def get_next_available_time(user_words: list) -> Optional[datetime]:
@@ -38,7 +37,7 @@ class DateTimeUtils:
         
         try:
             # next_datetimeが最も古い単語を取得
-            next_available_word = min(user_words, key=lambda x: x['next_datetime'])
+            next_available_word = min(user_words, key=_NEXT_DATETIME_KEY)
             return DateTimeUtils.parse_datetime_safe(next_available_word['next_datetime'])
         except (KeyError, ValueError) as e:
             logger.warning(f"Error getting next available time: {e}")
@@ -1,6 +1,8 @@
+import asyncio
 import logging
 from typing import List, Dict, Optional
 from integrations.dynamodb import progress_db, sentences_progress_db, kana_progress_db, user_settings_db
+from integrations.dynamodb.base import executor
 from common.config import MIN_LEVEL, MAX_LEVEL
 
 logger = logging.getLogger(__name__)
@@ -32,8 +34,13 @@ class RecommendationService:
             List[Dict]: レコメンドリスト（最大2件）
         """
         try:
-            # ユーザー設定を取得
-            user_settings = await user_settings_db.get_user_settings(user_id)
+            # ユーザー設定とkanaの進捗（一度だけ）を並行して取得
+            # どちらも同期APIのため、イベントループをブロックしないようスレッドプールで実行する
+            loop = asyncio.get_running_loop()
+            user_settings, kana_progress_list = await asyncio.gather(
+                loop.run_in_executor(executor, user_settings_db.get_user_settings, user_id),
+                loop.run_in_executor(executor, kana_progress_db.get_progress, user_id)
+            )
             if not user_settings:
                 logger.warning(f"User settings not found for user {user_id}")
                 return []
@@ -41,8 +48,6 @@ class RecommendationService:
             base_level = user_settings.base_level if user_settings.base_level else MIN_LEVEL
             recommendations = []
             
-            # kanaの進捗を取得（一度だけ）
-            kana_progress_list = await kana_progress_db.get_progress(user_id)
             kana_progress_by_level = {item['level']: item for item in kana_progress_list}
             kana_neg10 = kana_progress_by_level.get(-10)
             kana_neg7 = kana_progress_by_level.get(-7)
@@ -83,9 +88,11 @@ class RecommendationService:
 
             # base_levelから順にレベル15まで見ていく
             for level in range(max(base_level,1), min(MAX_LEVEL, 15) + 1):
-                # レベルごとにwordsとsentencesのprogressを取得
-                words_progress = await progress_db.get_progress_by_level(user_id, level)
-                sentences_progress = await sentences_progress_db.get_progress_by_level(user_id, level)
+                # レベルごとにwordsとsentencesのprogressを並行して取得
+                words_progress, sentences_progress = await asyncio.gather(
+                    progress_db.get_progress_by_level(user_id, level),
+                    sentences_progress_db.get_progress_by_level(user_id, level)
+                )
                 
                 
                 # 5. words level N reviewable >= 10
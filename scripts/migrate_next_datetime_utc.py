@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+学習履歴のnext_datetimeのマイグレーションスクリプト
+既存の学習履歴のnext_datetimeを、UTC・マイクロ秒まで含む固定長のISO形式に書き換えます
+（タイムゾーンなしの値はUTCとして扱います。user-next-datetime-index GSIの並び順を日時の順序と一致させるため）
+"""
+
+import boto3
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from botocore.exceptions import ClientError
+
+# ロギングの設定
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# DynamoDBクライアントの初期化
+dynamodb = boto3.resource('dynamodb')
+table_name = os.getenv('DYNAMODB_TABLE_NAME', 'japanese-learn-table')
+table = dynamodb.Table(table_name)
+
+def normalize_next_datetime(value):
+    """
+    next_datetimeをUTC・マイクロ秒まで含む固定長のISO形式に変換する（解析できない場合はNone）
+    """
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+def iter_learning_items():
+    """
+    next_datetimeを持つ学習履歴をページ単位で取得する
+    """
+    scan_params = {
+        'FilterExpression': 'begins_with(PK, :pk_prefix) AND attribute_exists(next_datetime)',
+        'ExpressionAttributeValues': {
+            ':pk_prefix': 'USER#'
+        },
+        'ProjectionExpression': 'PK, SK, next_datetime'
+    }
+    while True:
+        response = table.scan(**scan_params)
+        yield from response.get('Items', [])
+
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            break
+        scan_params['ExclusiveStartKey'] = last_evaluated_key
+
+def update_next_datetime(item, new_value):
+    """
+    next_datetimeを書き換える（読み込んだ後に学習で更新された場合は上書きしない）
+    """
+    try:
+        table.update_item(
+            Key={'PK': item['PK'], 'SK': item['SK']},
+            UpdateExpression='SET next_datetime = :new_value',
+            ConditionExpression='next_datetime = :old_value',
+            ExpressionAttributeValues={
+                ':new_value': new_value,
+                ':old_value': item['next_datetime']
+            }
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            logger.info(f"next_datetime was updated concurrently for {item['PK']} {item['SK']}, skipping...")
+            return False
+        raise
+
+def migrate_next_datetime(dry_run=False):
+    """
+    next_datetimeのマイグレーションを実行する
+    """
+    try:
+        logger.info("Starting next_datetime migration...")
+        logger.info(f"Using table: {table_name} (dry_run={dry_run})")
+
+        migrated_count = 0
+        skipped_count = 0
+        invalid_count = 0
+        error_count = 0
+
+        for item in iter_learning_items():
+            new_value = normalize_next_datetime(item['next_datetime'])
+            if new_value is None:
+                logger.warning(f"Invalid next_datetime for {item['PK']} {item['SK']}: {item['next_datetime']}")
+                invalid_count += 1
+                continue
+            if new_value == item['next_datetime']:
+                skipped_count += 1
+                continue
+
+            if dry_run:
+                logger.info(f"Would update {item['PK']} {item['SK']}: {item['next_datetime']} -> {new_value}")
+                migrated_count += 1
+                continue
+
+            try:
+                if update_next_datetime(item, new_value):
+                    migrated_count += 1
+                else:
+                    skipped_count += 1
+            except Exception as e:
+                logger.error(f"Error updating {item['PK']} {item['SK']}: {str(e)}")
+                error_count += 1
+
+        logger.info(f"Migration completed:")
+        logger.info(f"  - Migrated: {migrated_count}")
+        logger.info(f"  - Skipped: {skipped_count}")
+        logger.info(f"  - Invalid: {invalid_count}")
+        logger.info(f"  - Errors: {error_count}")
+
+    except Exception as e:
+        logger.error(f"Migration failed: {str(e)}")
+        raise
+
+def print_usage():
+    """
+    使用方法を表示する
+    """
+    print("""
+使用方法:
+1. 書き換え対象を確認（書き換えは行わない）:
+   DYNAMODB_TABLE_NAME=your-table-name python scripts/migrate_next_datetime_utc.py --dry-run
+
+2. 書き換えを実行:
+   DYNAMODB_TABLE_NAME=your-table-name python scripts/migrate_next_datetime_utc.py
+
+3. AWS認証情報が設定されていることを確認してください:
+   aws configure list
+   """)
+
+if __name__ == "__main__":
+    # テーブル名が設定されているかチェック
+    if not os.getenv('DYNAMODB_TABLE_NAME'):
+        print("警告: DYNAMODB_TABLE_NAME環境変数が設定されていません。")
+        print("デフォルトのテーブル名 'japanese-learn-table' を使用します。")
+        print_usage()
+
+    migrate_next_datetime(dry_run='--dry-run' in sys.argv[1:])